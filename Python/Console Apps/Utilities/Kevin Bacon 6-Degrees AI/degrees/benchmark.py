@@ -0,0 +1,211 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import degrees
+from graph import Graph
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Search variants timed by the benchmark, by name
+SEARCHES = {
+    "bfs": degrees.shortest_path,
+    "bidirectional": degrees.bidirectional_shortest_path,
+}
+
+
+def generate(directory, people, movies, cast_min=2, cast_max=8, distribution="powerlaw", seed=0):
+    """
+    Writes a synthetic people.csv, movies.csv and stars.csv to `directory`.
+
+    Each movie gets a uniformly random cast size. With the "powerlaw"
+    distribution, cast members are drawn with Zipf-like weights so a few
+    people star in many movies; with "uniform" everyone is equally likely.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,name,birth\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        for person in range(people):
+            writer.writerow([person + 1, f"Person {person + 1}", 1920 + rng.randrange(90)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        f.write("id,title,year\n")
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        for movie in range(movies):
+            writer.writerow([movie + 1, f"Movie {movie + 1}", 1930 + rng.randrange(95)])
+
+    if distribution == "powerlaw":
+        weights = [1 / (rank + 1) for rank in range(people)]
+        order = list(range(people))
+        rng.shuffle(order)
+        cumulative = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+
+        def cast(size):
+            return rng.choices(order, cum_weights=cumulative, k=size)
+    else:
+        def cast(size):
+            return [rng.randrange(people) for _ in range(size)]
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            for person in set(cast(rng.randint(cast_min, cast_max))):
+                writer.writerow([person + 1, movie + 1])
+
+
+def run(directory, queries=100, seed=0):
+    """
+    Times loading `directory` and answering random queries with each
+    search variant. Returns the measurements as a dict.
+    """
+    results = {}
+
+    snapshot = os.path.join(directory, degrees.SNAPSHOT_FILE)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+
+    degrees.graph = Graph()
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    results["csv_load_s"] = time.perf_counter() - start
+    results["people"] = degrees.graph.num_people
+    results["movies"] = degrees.graph.num_movies
+    results["stars"] = len(degrees.graph.person_movies)
+
+    degrees.graph = Graph()
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    results["snapshot_load_s"] = time.perf_counter() - start
+
+    # Draw query pairs from people who starred in something
+    rng = random.Random(seed)
+    offsets = degrees.graph.person_offsets
+    actors = [degrees.graph.person_ids[person] for person in range(degrees.graph.num_people)
+              if offsets[person + 1] > offsets[person]]
+    pairs = [(rng.choice(actors), rng.choice(actors)) for _ in range(queries)]
+
+    results["searches"] = {}
+    for name, search in SEARCHES.items():
+        latencies = []
+        explored = []
+        lengths = []
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target)
+            latencies.append(time.perf_counter() - start)
+            explored.append(degrees.num_explored)
+            lengths.append(None if path is None else len(path))
+        results["searches"][name] = {
+            "first_query_s": latencies[0],
+            "warm": _summary(latencies[1:]),
+            "mean_explored": sum(explored) / len(explored),
+            "connected": sum(length is not None for length in lengths),
+        }
+        results["searches"][name]["lengths"] = lengths
+
+    # Variants must agree on every path length
+    lengths = [results["searches"][name].pop("lengths") for name in SEARCHES]
+    results["lengths_agree"] = all(other == lengths[0] for other in lengths)
+    results["peak_rss_mb"] = _peak_rss_mb()
+    return results
+
+
+def _summary(latencies):
+    if not latencies:
+        return None
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "mean_s": sum(latencies) / count,
+        "p50_s": latencies[count // 2],
+        "p95_s": latencies[min(count - 1, int(0.95 * count))],
+        "max_s": latencies[-1],
+    }
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _run_in_child(directory, queries, seed, queue):
+    queue.put(run(directory, queries, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees load and search on synthetic graphs.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated numbers of people")
+    parser.add_argument("--movies-per-person", type=float, default=0.5)
+    parser.add_argument("--cast-min", type=int, default=2)
+    parser.add_argument("--cast-max", type=int, default=8)
+    parser.add_argument("--distribution", choices=("powerlaw", "uniform"), default="powerlaw")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json",
+                        help="JSON results file")
+    parser.add_argument("--data", metavar="DIR",
+                        help="keep generated datasets under DIR instead of a temporary directory")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as scratch:
+        root = args.data or scratch
+        for people in (int(size) for size in args.sizes.split(",")):
+            movies = max(1, int(people * args.movies_per_person))
+            directory = os.path.join(root, f"{args.distribution}-{people}")
+            print(f"Generating {people} people, {movies} movies...", file=sys.stderr)
+            generate(directory, people, movies, args.cast_min, args.cast_max,
+                     args.distribution, args.seed)
+
+            # Measure each size in a fresh process so peak RSS is its own
+            queue = multiprocessing.Queue()
+            child = multiprocessing.Process(
+                target=_run_in_child, args=(directory, args.queries, args.seed, queue))
+            child.start()
+            result = queue.get()
+            child.join()
+
+            result["config"] = {
+                "people": people,
+                "movies": movies,
+                "cast_min": args.cast_min,
+                "cast_max": args.cast_max,
+                "distribution": args.distribution,
+                "seed": args.seed,
+            }
+            runs.append(result)
+            searches = ", ".join(
+                f"{name} {search['warm']['mean_s'] * 1000:.2f}ms/{search['mean_explored']:.0f} explored"
+                for name, search in result["searches"].items() if search["warm"]
+            )
+            print(f"  csv {result['csv_load_s']:.2f}s, snapshot {result['snapshot_load_s'] * 1000:.1f}ms, "
+                  f"{searches}", file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "runs": runs}, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,109 @@
+import argparse
 import csv
+import json
+import multiprocessing
+import os
 import sys
+import time
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
-
-# Maps names to a set of corresponding person_ids
-names = {}
-
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
-
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
-
-
-def load_data(directory):
-    """
-    Load data from CSV files into memory.
-    """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+import loader
+import snapshot
+from graph import Graph
+from lookup import NameLookup
+from util import Node, QueueFrontier
+
+# Interned people and movies with integer-indexed co-star adjacency
+graph = Graph()
+
+# Binary snapshot of the loaded graph, kept next to the CSV files
+SNAPSHOT_FILE = "degrees.snapshot"
+
+# Prefix and fuzzy name search, built on first use by name_lookup()
+_name_lookup = None
+
+# Number of people expanded by the most recent search
+num_explored = 0
+
+
+def load_data(directory, use_snapshot=True, seeds=None, depth=None, measure=False):
+    """
+    Load data into memory, from the directory's binary snapshot
+    if it is current, otherwise from CSV files (rebuilding the snapshot).
+
+    If `seeds` is given, only the subgraph reachable from those people
+    is loaded from the CSV files and the snapshot is not used.
+    Returns the CSV LoadReport, or None if the snapshot was used.
+    """
+    global _name_lookup
+    _name_lookup = None
+
+    if seeds is not None:
+        return loader.load_csv(graph, directory, seeds, depth, measure)
+
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    if use_snapshot:
+        found = snapshot.read_header(path)
+        if found is not None and snapshot.is_current(found[0], directory, path, found[1]):
+            snapshot.load(path, graph, *found)
+            return None
+
+    report = loader.load_csv(graph, directory, measure=measure)
+    if report.dangling:
+        print(f"Skipped {report.dangling} stars rows with unknown person_id or movie_id.",
+              file=sys.stderr)
+
+    if use_snapshot:
+        try:
+            snapshot.write(path, graph, snapshot.source_info(directory))
+        except OSError as e:
+            print(f"Could not write snapshot: {e}", file=sys.stderr)
+    return report
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--compare", action="store_true",
+                        help="report explored people for both search modes")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="always parse the CSV files and skip the snapshot")
+    parser.add_argument("--seed", action="append", metavar="NAME_OR_ID",
+                        help="only load people reachable from this person (repeatable)")
+    parser.add_argument("--depth", type=int,
+                        help="with --seed, only load people within this many co-star steps")
+    parser.add_argument("--load-report", action="store_true",
+                        help="report load counts, skipped rows and peak memory")
+    parser.add_argument("--batch", metavar="PAIRS_CSV",
+                        help="answer every source,target pair in a CSV file")
+    parser.add_argument("--output", metavar="FILE",
+                        help="batch results file (default: stdout)")
+    parser.add_argument("--format", choices=("csv", "ndjson"),
+                        help="batch results format (default: from --output, else csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="batch worker processes")
+    args = parser.parse_args()
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=sys.stderr if args.batch else sys.stdout)
+    options = {"use_snapshot": not args.no_snapshot and not args.load_report,
+               "seeds": args.seed, "depth": args.depth}
+    report = load_data(args.directory, measure=args.load_report, **options)
+    print("Data loaded.", file=sys.stderr if args.batch else sys.stdout)
+    if args.load_report and report is not None:
+        print(report, file=sys.stderr)
+
+    if args.batch:
+        output_format = args.format or (
+            "ndjson" if args.output and args.output.endswith((".ndjson", ".jsonl")) else "csv")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                run_batch(args.batch, f, output_format, args.directory, args.workers, options)
+        else:
+            run_batch(args.batch, sys.stdout, output_format, args.directory, args.workers, options)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +112,19 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.compare:
+        path = shortest_path(source, target)
+        explored = num_explored
+        bidirectional_path = bidirectional_shortest_path(source, target)
+        print(f"Breadth-first explored: {explored}")
+        print(f"Bidirectional explored: {num_explored}")
+        if (path is None) != (bidirectional_path is None) or (
+                path is not None and len(path) != len(bidirectional_path)):
+            print("Warning: search modes disagree on path length.")
+    elif args.bidirectional:
+        path = bidirectional_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,9 +133,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person_names[graph.person_index[path[i][1]]]
+            person2 = graph.person_names[graph.person_index[path[i + 1][1]]]
+            movie = graph.movie_titles[graph.movie_index[path[i + 1][0]]]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -91,33 +146,350 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    global num_explored
+    num_explored = 0
+
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
-    explored = set()
+
+    # Marks people that are explored or already in the frontier
+    seen = bytearray(graph.num_people)
+    seen[source] = 1
 
     while True:
         if frontier.empty():
             return None
 
         node = frontier.remove()
+        num_explored += 1
         if node.state == target:
-            actions = []
-            cells = []
-            while node.parent is not None:
-                actions.append(node.action)
-                cells.append(node.state)
-                node = node.parent
-            actions.reverse()
-            cells.reverse()
-            return list(zip(actions, cells))
+            return _path_for_node(node)
+
+        for k in range(person_offsets[node.state], person_offsets[node.state + 1]):
+            movie = person_movies[k]
+            for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                person = movie_people[n]
+                if not seen[person]:
+                    seen[person] = 1
+                    child = Node(state=person, parent=node, action=movie)
+                    frontier.add(child)
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outward
+    from both people and always growing the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if source == target:
+        return []
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    # Each side maps a reached person to (movie, person) toward its root,
+    # plus the person's distance from that root
+    forward = {source: None}
+    backward = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            parents, depth, other_depth = forward, forward_depth, backward_depth
+            frontier = forward_frontier
+        else:
+            parents, depth, other_depth = backward, backward_depth, forward_depth
+            frontier = backward_frontier
+
+        # Expand one whole level so the best meeting point is found
+        best = None
+        next_frontier = []
+        for person in frontier:
+            num_explored += 1
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[n]
+                    if neighbor in other_depth:
+                        length = depth[person] + 1 + other_depth[neighbor]
+                        if best is None or length < best[0]:
+                            best = (length, person, movie, neighbor)
+                    if neighbor not in parents:
+                        parents[neighbor] = (movie, person)
+                        depth[neighbor] = depth[person] + 1
+                        next_frontier.append(neighbor)
+
+        if best is not None:
+            _, person, movie, neighbor = best
+            if parents is forward:
+                return _stitch_path(forward, backward, person, movie, neighbor)
+            return _stitch_path(forward, backward, neighbor, movie, person)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def shortest_path_tree(source):
+    """
+    Returns a breadth-first tree of every person reachable from
+    the source, as (parent_people, parent_movies) arrays indexed by
+    person index. Unreached people have a parent of -1 and the
+    source is its own parent.
+    """
+    global num_explored
+    num_explored = 0
+
+    source = graph.person_index[source]
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    parent_people = array("i", [-1]) * graph.num_people
+    parent_movies = array("i", [-1]) * graph.num_people
+    parent_people[source] = source
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+
+    while not frontier.empty():
+        person = frontier.remove().state
+        num_explored += 1
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                neighbor = movie_people[n]
+                if parent_people[neighbor] == -1:
+                    parent_people[neighbor] = person
+                    parent_movies[neighbor] = movie
+                    frontier.add(Node(state=neighbor, parent=None, action=movie))
+
+    return parent_people, parent_movies
+
+
+def path_from_tree(tree, target, reverse=False):
+    """
+    Returns the (movie_id, person_id) pairs from the root of a
+    shortest_path_tree to the target, or from the target to the
+    root if `reverse` is set.
+
+    If the target was not reached, returns None.
+    """
+    parent_people, parent_movies = tree
+    person = graph.person_index[target]
+    if parent_people[person] == -1:
+        return None
+
+    path = []
+    while parent_people[person] != person:
+        parent = parent_people[person]
+        if reverse:
+            path.append((graph.movie_ids[parent_movies[person]], graph.person_ids[parent]))
+        else:
+            path.append((graph.movie_ids[parent_movies[person]], graph.person_ids[person]))
+        person = parent
+    if not reverse:
+        path.reverse()
+    return path
+
+
+def _stitch_path(forward, backward, meet_forward, movie, meet_backward):
+    """
+    Returns the (movie_id, person_id) pairs for the path that runs
+    through the forward tree to `meet_forward`, across `movie` to
+    `meet_backward`, then through the backward tree to the target.
+    """
+    steps = []
+    person = meet_forward
+    while forward[person] is not None:
+        parent_movie, parent = forward[person]
+        steps.append((parent_movie, person))
+        person = parent
+    steps.reverse()
+
+    steps.append((movie, meet_backward))
+    person = meet_backward
+    while backward[person] is not None:
+        parent_movie, parent = backward[person]
+        steps.append((parent_movie, parent))
+        person = parent
+
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in steps]
+
 
-        explored.add(node.state)
+def _path_for_node(node):
+    """
+    Returns the (movie_id, person_id) pairs that lead to an
+    integer-indexed search node.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((graph.movie_ids[node.action], graph.person_ids[node.state]))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def run_batch(pairs_file, outfile, output_format, directory, workers, options=None):
+    """
+    Answers every source,target pair in a CSV file, writing one result
+    per pair as it finishes. Pairs are grouped by source so that each
+    breadth-first tree is built once and shared by all its targets,
+    and groups are spread over a process pool. Workers that cannot
+    inherit the graph load it with the same load_data `options`.
+    """
+    groups = {}
+    total = 0
+    writer = _BatchWriter(outfile, output_format)
+    with open(pairs_file, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if not row or [field.strip().lower() for field in row] == ["source", "target"]:
+                continue
+            total += 1
+            if len(row) != 2:
+                writer.write({"source": ",".join(row), "error": "expected source,target"})
+                continue
+            source_name, target_name = (field.strip() for field in row)
+            try:
+                source = resolve_person(source_name)
+                target = resolve_person(target_name)
+            except LookupError as e:
+                writer.write({"source": source_name, "target": target_name, "error": str(e)})
+                continue
+            groups.setdefault(source, []).append((source_name, target_name, target))
+
+    done = total - sum(len(targets) for targets in groups.values())
+    start = time.perf_counter()
+    tasks = ((source, targets) for source, targets in groups.items())
+    with multiprocessing.Pool(max(1, workers), initializer=_init_batch_worker,
+                              initargs=(directory, options or {})) as pool:
+        for results in pool.imap_unordered(_batch_group, tasks):
+            for result in results:
+                writer.write(result)
+            done += len(results)
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed else 0
+            print(f"\r{done}/{total} pairs, {rate:.1f} pairs/s", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+
+class _BatchWriter():
+    """
+    Streams batch results to a file as CSV rows or NDJSON lines.
+    """
+    FIELDS = ["source", "target", "source_id", "target_id", "degrees", "path", "error"]
 
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(state=person_id, parent=node, action=movie_id)
-                frontier.add(child)
+    def __init__(self, outfile, output_format):
+        self.outfile = outfile
+        self.output_format = output_format
+        if output_format == "csv":
+            self.writer = csv.DictWriter(outfile, fieldnames=self.FIELDS)
+            self.writer.writeheader()
+
+    def write(self, result):
+        if self.output_format == "csv":
+            row = dict(result)
+            if row.get("path") is not None:
+                row["path"] = " ".join(f"{movie_id}:{person_id}" for movie_id, person_id in row["path"])
+            self.writer.writerow(row)
+        else:
+            self.outfile.write(json.dumps(result) + "\n")
+        self.outfile.flush()
+
+
+def _init_batch_worker(directory, options):
+    """
+    Loads the graph in a worker process unless it was inherited.
+    """
+    if graph.num_people == 0:
+        load_data(directory, **options)
+
+
+def _batch_group(task):
+    """
+    Returns results for one source and all of its targets.
+    """
+    source, targets = task
+    tree = shortest_path_tree(source)
+    results = []
+    for source_name, target_name, target in targets:
+        path = path_from_tree(tree, target)
+        results.append({
+            "source": source_name,
+            "target": target_name,
+            "source_id": source,
+            "target_id": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+        })
+    return results
+
+
+def name_lookup():
+    """
+    Returns the name search index for the loaded graph,
+    building it the first time it is needed.
+    """
+    global _name_lookup
+    if _name_lookup is None:
+        _name_lookup = NameLookup(graph)
+    return _name_lookup
+
+
+def suggest_people(name, limit=5):
+    """
+    Returns up to `limit` IMDB ids for people whose names
+    start with or closely resemble `name`.
+    """
+    return [graph.person_ids[person] for person in name_lookup().search(name, limit)]
+
+
+def _describe(person_id):
+    person = graph.person_index[person_id]
+    return f"{graph.person_names[person]} ({graph.person_births[person] or '?'}, ID: {person_id})"
+
+
+def resolve_person(name):
+    """
+    Returns the IMDB id for an IMDB id or an unambiguous name,
+    without prompting. Raises LookupError otherwise.
+    """
+    if name in graph.person_index:
+        return name
+    people = graph.names.get(name.lower(), [])
+    if len(people) == 0:
+        suggestions = suggest_people(name)
+        if suggestions:
+            raise LookupError(
+                f"person not found: {name}; did you mean "
+                + "; ".join(_describe(person_id) for person_id in suggestions))
+        raise LookupError(f"person not found: {name}")
+    if len(people) > 1:
+        ids = ", ".join(graph.person_ids[person] for person in people)
+        raise LookupError(f"ambiguous name {name}: {ids}")
+    return graph.person_ids[people[0]]
 
 
 def person_id_for_name(name):
@@ -125,15 +497,20 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = [graph.person_ids[person] for person in graph.names.get(name.lower(), [])]
     if len(person_ids) == 0:
+        suggestions = suggest_people(name)
+        if suggestions:
+            print(f"No '{name}'. Did you mean:")
+            for person_id in suggestions:
+                print(f"  {_describe(person_id)}")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            person = graph.person_index[person_id]
+            name = graph.person_names[person]
+            birth = graph.person_births[person]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -148,15 +525,11 @@ def person_id_for_name(name):
 
 def neighbors_for_person(person_id):
     """
-    Returns (movie_id, person_id) pairs for people
+    Yields (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    for movie, person in graph.neighbors(graph.person_index[person_id]):
+        yield graph.movie_ids[movie], graph.person_ids[person]
 
 
 if __name__ == "__main__":
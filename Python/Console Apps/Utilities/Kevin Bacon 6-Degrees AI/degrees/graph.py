@@ -0,0 +1,153 @@
+from array import array
+
+
+class Graph():
+    """
+    Co-star network stored as integer-indexed CSR adjacency.
+
+    Person and movie IDs are interned to dense integers, and the
+    person -> movies and movie -> people relations are each kept as
+    an offsets array plus a flat index array.
+    """
+
+    def __init__(self):
+        # Interned person data, indexed by person index
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.person_index = {}
+
+        # Interned movie data, indexed by movie index
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+        self.movie_index = {}
+
+        # Maps lowercase names to a list of person indexes
+        self.names = {}
+
+        # CSR adjacency, filled in by build()
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_people = array("i")
+
+        # Memory map backing the arrays and indexes above, if they were
+        # loaded from a snapshot; those indexes are read-only
+        self.snapshot = None
+
+    def clear(self):
+        """
+        Empties the graph, dropping any snapshot it was loaded from, so
+        it can be filled again.
+        """
+        self.__init__()
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person and returns their index.
+        """
+        index = self.person_index.get(person_id)
+        if index is not None:
+            return index
+        index = len(self.person_ids)
+        self.person_index[person_id] = index
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.names.setdefault(name.lower(), []).append(index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie and returns its index.
+        """
+        index = self.movie_index.get(movie_id)
+        if index is not None:
+            return index
+        index = len(self.movie_ids)
+        self.movie_index[movie_id] = index
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return index
+
+    def build(self, person_column, movie_column):
+        """
+        Builds both CSR adjacencies from parallel arrays of
+        (person index, movie index) edges. Duplicate edges are dropped.
+        """
+        self.person_offsets, self.person_movies = _csr(
+            len(self.person_ids), person_column, movie_column
+        )
+        self.movie_offsets, self.movie_people = _csr(
+            len(self.movie_ids), movie_column, person_column
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_for(self, person):
+        """
+        Returns the movie indexes for a person index.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Returns the person indexes for a movie index.
+        """
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with a given person index.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for n in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[n]
+
+
+def _csr(size, rows, cols):
+    """
+    Returns (offsets, indexes) arrays for the sorted, de-duplicated
+    adjacency of `size` rows given parallel row/column arrays.
+    """
+    # Count sort the edges by row
+    counts = array("i", bytes(array("i").itemsize * (size + 1)))
+    for row in rows:
+        counts[row + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+    cursor = array("i", counts)
+    indexes = array("i", bytes(array("i").itemsize * len(rows)))
+    for row, col in zip(rows, cols):
+        indexes[cursor[row]] = col
+        cursor[row] += 1
+
+    # Sort each row and drop duplicate columns in place
+    offsets = array("i", [0])
+    write = 0
+    for i in range(size):
+        previous = None
+        for col in sorted(indexes[counts[i]:counts[i + 1]]):
+            if col != previous:
+                indexes[write] = col
+                write += 1
+                previous = col
+        offsets.append(write)
+    del indexes[write:]
+    return offsets, indexes
@@ -0,0 +1,162 @@
+import csv
+import itertools
+import tracemalloc
+from array import array
+
+# Rows parsed per chunk while streaming a CSV file
+CHUNK_SIZE = 65536
+
+
+class LoadReport():
+    """
+    Counts of what a CSV load kept and skipped.
+    """
+
+    def __init__(self):
+        self.people = 0
+        self.movies = 0
+        self.stars = 0
+        self.dangling_people = 0
+        self.dangling_movies = 0
+        self.passes = 0
+        self.peak_bytes = None
+
+    @property
+    def dangling(self):
+        return self.dangling_people + self.dangling_movies
+
+    def __str__(self):
+        lines = [f"Loaded {self.people} people, {self.movies} movies, {self.stars} stars."]
+        if self.dangling:
+            lines.append(
+                f"Skipped {self.dangling} stars rows: "
+                f"{self.dangling_people} unknown person_id, {self.dangling_movies} unknown movie_id."
+            )
+        if self.passes:
+            lines.append(f"Seed expansion read stars.csv {self.passes} times.")
+        if self.peak_bytes is not None:
+            lines.append(f"Peak traced memory during load: {self.peak_bytes / 2 ** 20:.1f} MiB.")
+        return "\n".join(lines)
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of tuples holding the named columns of a CSV file,
+    at most `chunk_size` rows at a time.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        rows = (
+            tuple(row[i] for i in positions) if len(row) >= width
+            else tuple(row[i] if i < len(row) else None for i in positions)
+            for row in reader if row
+        )
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def load_csv(graph, directory, seeds=None, depth=None, measure=False):
+    """
+    Streams people.csv, movies.csv and stars.csv into `graph`,
+    replacing anything it held, and returns a LoadReport.
+
+    If `seeds` (person ids or names) is given, only the people and
+    movies reachable from them within `depth` co-star steps are kept.
+    If `measure` is set, peak memory during the load is traced.
+    """
+    if measure:
+        tracemalloc.start()
+    try:
+        graph.clear()
+        report = LoadReport()
+        people = movies = None
+        if seeds is not None:
+            people, movies = _reachable(directory, seeds, depth, report)
+
+        for chunk in read_chunks(f"{directory}/people.csv", ("id", "name", "birth")):
+            for person_id, name, birth in chunk:
+                if people is None or person_id in people:
+                    graph.add_person(person_id, name, birth)
+
+        for chunk in read_chunks(f"{directory}/movies.csv", ("id", "title", "year")):
+            for movie_id, title, year in chunk:
+                if movies is None or movie_id in movies:
+                    graph.add_movie(movie_id, title, year)
+
+        person_column = array("i")
+        movie_column = array("i")
+        person_index = graph.person_index
+        movie_index = graph.movie_index
+        for chunk in read_chunks(f"{directory}/stars.csv", ("person_id", "movie_id")):
+            for person_id, movie_id in chunk:
+                person = person_index.get(person_id)
+                movie = movie_index.get(movie_id)
+                if person is not None and movie is not None:
+                    person_column.append(person)
+                    movie_column.append(movie)
+                elif people is None:
+                    if person is None:
+                        report.dangling_people += 1
+                    if movie is None:
+                        report.dangling_movies += 1
+                else:
+                    # Rows outside a seeded subgraph are expected, not dangling
+                    if person is None and person_id in people:
+                        report.dangling_people += 1
+                    if movie is None and movie_id in movies:
+                        report.dangling_movies += 1
+        graph.build(person_column, movie_column)
+
+        report.people = graph.num_people
+        report.movies = graph.num_movies
+        report.stars = len(graph.person_movies)
+        if measure:
+            report.peak_bytes = tracemalloc.get_traced_memory()[1]
+        return report
+    finally:
+        if measure:
+            tracemalloc.stop()
+
+
+def _reachable(directory, seeds, depth, report):
+    """
+    Returns the (person ids, movie ids) sets reachable from the seeds,
+    found by repeated passes over stars.csv so that only the
+    reachable sets are ever held in memory.
+    """
+    seeds = set(seeds)
+    lowered = {seed.lower() for seed in seeds}
+    people = set()
+    for chunk in read_chunks(f"{directory}/people.csv", ("id", "name")):
+        for person_id, name in chunk:
+            if person_id in seeds or (name or "").lower() in lowered:
+                people.add(person_id)
+
+    # Each step finds the new movies of reached people in one pass,
+    # then the new people in those movies in a second pass
+    movies = set()
+    steps = 0
+    while depth is None or steps < depth:
+        report.passes += 2
+        found_people = set()
+        found_movies = set()
+        for chunk in read_chunks(f"{directory}/stars.csv", ("person_id", "movie_id")):
+            for person_id, movie_id in chunk:
+                if person_id in people and movie_id not in movies:
+                    found_movies.add(movie_id)
+        for chunk in read_chunks(f"{directory}/stars.csv", ("person_id", "movie_id")):
+            for person_id, movie_id in chunk:
+                if movie_id in found_movies and person_id not in people:
+                    found_people.add(person_id)
+        movies |= found_movies
+        people |= found_people
+        steps += 1
+        if not found_people:
+            break
+    return people, movies
@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+
+class NameLookup():
+    """
+    Prefix and fuzzy search over the people in a graph.
+
+    Distinct normalized names are kept sorted for prefix search, and
+    a trigram index maps each trigram to the names that contain it
+    so fuzzy matches only score names that share some trigrams.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+        people = {}
+        for person in range(graph.num_people):
+            people.setdefault(normalize(graph.person_names[person]), []).append(person)
+
+        # Sorted distinct names and the people with each name
+        self.keys = sorted(people)
+        self.people = [people[key] for key in self.keys]
+
+        # Maps each trigram to the indexes of the names containing it
+        self.trigrams = {}
+        for i, key in enumerate(self.keys):
+            for trigram in set(_trigrams(key)):
+                postings = self.trigrams.get(trigram)
+                if postings is None:
+                    postings = self.trigrams[trigram] = array("i")
+                postings.append(i)
+
+    def films(self, person):
+        """
+        Returns the number of movies a person index starred in.
+        """
+        offsets = self.graph.person_offsets
+        return offsets[person + 1] - offsets[person]
+
+    def exact(self, name):
+        """
+        Returns the person indexes whose name matches exactly.
+        """
+        key = normalize(name)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self._ranked(self.people[i])
+        return []
+
+    def prefix(self, text, limit=10):
+        """
+        Returns up to `limit` person indexes whose name starts
+        with `text`, most films first.
+        """
+        key = normalize(text)
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + "\uffff", lo=start)
+        matches = [person for i in range(start, end) for person in self.people[i]]
+        return self._ranked(matches)[:limit]
+
+    def fuzzy(self, text, limit=10, max_distance=3, candidates=200):
+        """
+        Returns up to `limit` (person index, edit distance) pairs for
+        names within `max_distance` edits of `text`, ranked by edit
+        distance and then by number of films.
+        """
+        key = normalize(text)
+
+        # Each edit destroys at most three trigrams, so any match shares
+        # one of the query's 3 * max_distance + 1 rarest trigrams
+        query = sorted(set(_trigrams(key)), key=lambda t: len(self.trigrams.get(t, ())))
+        shared = Counter()
+        for trigram in query[:3 * max_distance + 1]:
+            shared.update(self.trigrams.get(trigram, ()))
+
+        # Only score the names sharing the most trigrams with the query
+        matches = []
+        for i, _ in shared.most_common(candidates):
+            distance = edit_distance(key, self.keys[i], max_distance)
+            if distance <= max_distance:
+                for person in self.people[i]:
+                    matches.append((distance, -self.films(person), person))
+        matches.sort()
+        return [(person, distance) for distance, _, person in matches[:limit]]
+
+    def search(self, text, limit=10):
+        """
+        Returns up to `limit` person indexes for `text`: exact matches,
+        then prefix matches, then fuzzy matches.
+        """
+        results = []
+        for person in self.exact(text) + self.prefix(text, limit):
+            if person not in results:
+                results.append(person)
+        if len(results) < limit:
+            for person, _ in self.fuzzy(text, limit):
+                if person not in results:
+                    results.append(person)
+        return results[:limit]
+
+    def _ranked(self, people):
+        return sorted(people, key=self.films, reverse=True)
+
+
+def normalize(name):
+    """
+    Returns a name lowercased with whitespace collapsed.
+    """
+    return " ".join(name.lower().split())
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, max_distance=None):
+    """
+    Returns the Levenshtein distance between two strings, or
+    max_distance + 1 once it is known to exceed max_distance.
+    """
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
@@ -0,0 +1,274 @@
+import argparse
+import csv
+import json
+import os
+import socketserver
+import stat
+import sys
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+class PathCache():
+    """
+    Least-recently-used cache of shortest_path results,
+    keyed by (source person_id, target person_id).
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            path = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def put(self, key, path):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = path
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class QueryServer():
+    """
+    Answers source/target queries against the loaded graph,
+    caching recent paths and BFS trees for hub actors.
+    """
+
+    def __init__(self, cache_size=1024, hubs=0):
+        self.cache = PathCache(cache_size)
+        self.trees = {}
+        self.queries = 0
+        # Latencies of the most recent queries, for percentiles
+        self.latencies = deque(maxlen=10000)
+        for person in _hub_people(hubs):
+            person_id = degrees.graph.person_ids[person]
+            self.trees[person_id] = degrees.shortest_path_tree(person_id)
+
+    def query(self, source_name, target_name):
+        """
+        Returns a result dict for a single source/target query.
+        """
+        start = time.perf_counter()
+        result = {"source": source_name, "target": target_name}
+        try:
+            source = degrees.resolve_person(source_name.strip())
+            target = degrees.resolve_person(target_name.strip())
+        except LookupError as e:
+            result["error"] = str(e)
+        else:
+            path, result["cached"] = self.path(source, target)
+            result["degrees"] = None if path is None else len(path)
+            result["path"] = None if path is None else [
+                {"movie_id": movie_id, "person_id": person_id} for movie_id, person_id in path
+            ]
+        latency = time.perf_counter() - start
+        self.queries += 1
+        self.latencies.append(latency)
+        result["latency_ms"] = round(latency * 1000, 3)
+        return result
+
+    def path(self, source, target):
+        """
+        Returns (path, cached) for two person_ids.
+        """
+        key = (source, target)
+        try:
+            return self.cache.get(key), True
+        except KeyError:
+            pass
+
+        if source in self.trees:
+            path = degrees.path_from_tree(self.trees[source], target)
+        elif target in self.trees:
+            path = degrees.path_from_tree(self.trees[target], source, reverse=True)
+        else:
+            path = degrees.bidirectional_shortest_path(source, target)
+        self.cache.put(key, path)
+        return path, False
+
+    def search(self, text, limit=10):
+        """
+        Returns ranked name search candidates for `text`.
+        """
+        start = time.perf_counter()
+        people = degrees.name_lookup().search(text, limit)
+        return {
+            "query": text,
+            "candidates": [{
+                "person_id": degrees.graph.person_ids[person],
+                "name": degrees.graph.person_names[person],
+                "birth": degrees.graph.person_births[person],
+            } for person in people],
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def handle_line(self, line):
+        """
+        Answers one "source,target" CSV line with a JSON line,
+        or returns None for a blank line.
+        """
+        fields = next(csv.reader([line]), [])
+        if not fields:
+            return None
+        if len(fields) != 2:
+            return json.dumps({"error": "expected 'source,target'", "line": line.rstrip("\n")})
+        return json.dumps(self.query(*fields))
+
+    def stats(self):
+        """
+        Returns a summary of query count, recent latency and cache use.
+        """
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p):
+            return round(latencies[min(count - 1, int(p * count))] * 1000, 3) if count else None
+
+        return {
+            "queries": self.queries,
+            "mean_ms": round(sum(latencies) / count * 1000, 3) if count else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "hub_trees": len(self.trees),
+        }
+
+
+def _hub_people(count):
+    """
+    Returns the `count` person indexes who starred in the most movies.
+    """
+    if count <= 0:
+        return []
+    offsets = degrees.graph.person_offsets
+    return sorted(
+        range(degrees.graph.num_people),
+        key=lambda person: offsets[person + 1] - offsets[person],
+        reverse=True
+    )[:count]
+
+
+def serve_stdin(server, infile=sys.stdin, outfile=sys.stdout):
+    """
+    Answers queries line by line until end of input.
+    """
+    for line in infile:
+        response = server.handle_line(line)
+        if response is not None:
+            print(response, file=outfile, flush=True)
+    print(json.dumps(server.stats()), file=sys.stderr)
+
+
+def serve_http(server, host, port):
+    """
+    Answers GET /path?source=...&target=..., GET /search?q=...
+    and GET /stats.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if url.path == "/stats":
+                self.reply(200, server.stats())
+            elif url.path == "/search" and "q" in params:
+                self.reply(200, server.search(params["q"][0]))
+            elif url.path == "/path" and "source" in params and "target" in params:
+                self.reply(200, server.query(params["source"][0], params["target"][0]))
+            else:
+                self.reply(404, {"error": "use /path?source=...&target=..., /search?q=... or /stats"})
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    httpd = HTTPServer((host, port), Handler)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def serve_unix(server, path):
+    """
+    Answers "source,target" lines on a Unix domain socket.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            for line in self.rfile:
+                response = server.handle_line(line.decode("utf-8"))
+                if response is not None:
+                    self.wfile.write(response.encode("utf-8") + b"\n")
+
+    # Only a stale socket left by an earlier server is replaced
+    if os.path.lexists(path):
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            raise Exception(f"{path} exists and is not a socket")
+        os.remove(path)
+    unixd = socketserver.UnixStreamServer(path, Handler)
+    print(f"Serving on {path}", file=sys.stderr)
+    try:
+        unixd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        unixd.server_close()
+        if os.path.lexists(path) and stat.S_ISSOCK(os.lstat(path).st_mode):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many degrees queries from one loaded graph.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--http", metavar="PORT", type=int,
+                        help="serve over HTTP on localhost instead of stdin")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="serve on a Unix domain socket instead of stdin")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="number of recent paths to keep")
+    parser.add_argument("--hubs", type=int, default=0,
+                        help="precompute BFS trees for this many best-connected people")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    degrees.load_data(args.directory)
+    server = QueryServer(cache_size=args.cache_size, hubs=args.hubs)
+    print(f"Data loaded in {time.perf_counter() - start:.2f}s.", file=sys.stderr)
+
+    if args.http is not None:
+        serve_http(server, "127.0.0.1", args.http)
+    elif args.socket is not None:
+        serve_unix(server, args.socket)
+    else:
+        serve_stdin(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAGIC = b"DEGSNAP1"
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# String tables of the snapshot, each stored as a UTF-8 blob plus offsets
+TABLES = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+
+class StringTable():
+    """
+    Read-only sequence of strings decoded on demand from a blob.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _SortedView():
+    """
+    Sequence of `key(table[order[i]])`, suitable for bisect.
+    """
+
+    def __init__(self, table, order, key=None):
+        self.table = table
+        self.order = order
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        value = self.table[self.order[i]]
+        return self.key(value) if self.key else value
+
+
+class SortedIndex():
+    """
+    Read-only mapping from string to table index, backed by a
+    permutation of the table sorted by value.
+    """
+
+    def __init__(self, table, order):
+        self.order = order
+        self.keys = _SortedView(table, order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def get(self, key, default=None):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.order[i]
+        return default
+
+    def __getitem__(self, key):
+        index = self.get(key)
+        if index is None:
+            raise KeyError(key)
+        return index
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class NameIndex():
+    """
+    Read-only mapping from a lowercase name to the list of
+    person indexes with that name.
+    """
+
+    def __init__(self, names, order):
+        self.order = order
+        self.keys = _SortedView(names, order, key=str.lower)
+
+    def get(self, name, default=None):
+        start = bisect_left(self.keys, name)
+        end = bisect_right(self.keys, name, lo=start)
+        if start == end:
+            return default
+        return list(self.order[start:end])
+
+    def __getitem__(self, name):
+        people = self.get(name)
+        if people is None:
+            raise KeyError(name)
+        return people
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+
+def source_info(directory):
+    """
+    Returns size, mtime and SHA-256 for each source CSV.
+    """
+    info = {}
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        info[name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _sha256(path),
+        }
+    return info
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write(path, graph, sources):
+    """
+    Writes `graph` to a snapshot file at `path`, recording the
+    source file info it was built from.
+    """
+    sections = {}
+    sections["person_offsets"] = array("i", graph.person_offsets)
+    sections["person_movies"] = array("i", graph.person_movies)
+    sections["movie_offsets"] = array("i", graph.movie_offsets)
+    sections["movie_people"] = array("i", graph.movie_people)
+    sections["person_order"] = array(
+        "i", sorted(range(graph.num_people), key=graph.person_ids.__getitem__))
+    sections["movie_order"] = array(
+        "i", sorted(range(graph.num_movies), key=graph.movie_ids.__getitem__))
+    sections["name_order"] = array(
+        "i", sorted(range(graph.num_people), key=lambda p: graph.person_names[p].lower()))
+    for name in TABLES:
+        blob, offsets = _encode_table(getattr(graph, name))
+        sections[f"{name}_blob"] = blob
+        sections[f"{name}_offsets"] = offsets
+
+    # Lay sections out on 8-byte boundaries after the header
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        size = len(data) * data.itemsize
+        layout[name] = [position, size, data.typecode]
+        position += _align(size)
+    header = json.dumps({
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "itemsize": array("i").itemsize,
+        "sources": sources,
+        "sections": layout,
+    }).encode("utf-8")
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(bytes(_align(f.tell()) - f.tell()))
+        for name, data in sections.items():
+            raw = data.tobytes()
+            f.write(raw)
+            f.write(bytes(_align(len(raw)) - len(raw)))
+    os.replace(temporary, path)
+
+
+def read_header(path):
+    """
+    Returns (header, data start) for a snapshot file,
+    or None if the file is missing or not a usable snapshot.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    if (header.get("version") != VERSION
+            or header.get("byteorder") != sys.byteorder
+            or header.get("itemsize") != array("i").itemsize):
+        return None
+    return header, _align(len(MAGIC) + 4 + length)
+
+
+def is_current(header, directory, path=None, start=None):
+    """
+    Returns True if the snapshot header matches the source CSVs.
+
+    Files whose size and mtime are unchanged are trusted; any other
+    file is re-hashed and compared against the recorded SHA-256. When
+    a re-hashed file still matches and the snapshot's `path` and data
+    `start` are given, its new mtime is written back to the header so
+    the next load can trust it again.
+    """
+    recorded = header["sources"]
+    touched = {}
+    for name in SOURCES:
+        source = os.path.join(directory, name)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        expected = recorded.get(name)
+        if expected is None or expected["size"] != stat.st_size:
+            return False
+        if expected["mtime_ns"] != stat.st_mtime_ns:
+            if expected["sha256"] != _sha256(source):
+                return False
+            touched[name] = stat.st_mtime_ns
+
+    if touched and path is not None and start is not None:
+        sources = {name: dict(info, mtime_ns=touched.get(name, info["mtime_ns"]))
+                   for name, info in recorded.items()}
+        _rewrite_header(path, dict(header, sources=sources), start)
+    return True
+
+
+def _rewrite_header(path, header, start):
+    """
+    Overwrites a snapshot's header in place, as long as the new header
+    still ends before the data at `start`; otherwise leaves it alone.
+    """
+    encoded = json.dumps(header).encode("utf-8")
+    end = len(MAGIC) + 4 + len(encoded)
+    if _align(end) != start:
+        return
+    try:
+        with open(path, "r+b") as f:
+            f.seek(len(MAGIC))
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+            f.write(bytes(start - end))
+    except OSError:
+        pass
+
+
+def load(path, graph, header, start):
+    """
+    Memory-maps a snapshot file and points `graph` at its sections.
+    """
+    with open(path, "rb") as f:
+        snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(snapshot)
+
+    sections = {}
+    for name, (position, size, typecode) in header["sections"].items():
+        sections[name] = view[start + position:start + position + size].cast(typecode)
+
+    graph.snapshot = snapshot
+    graph.person_offsets = sections["person_offsets"]
+    graph.person_movies = sections["person_movies"]
+    graph.movie_offsets = sections["movie_offsets"]
+    graph.movie_people = sections["movie_people"]
+    for name in TABLES:
+        setattr(graph, name, StringTable(sections[f"{name}_blob"], sections[f"{name}_offsets"]))
+    graph.person_index = SortedIndex(graph.person_ids, sections["person_order"])
+    graph.movie_index = SortedIndex(graph.movie_ids, sections["movie_order"])
+    graph.names = NameIndex(graph.person_names, sections["name_order"])
+
+
+def _encode_table(strings):
+    blob = bytearray()
+    offsets = array("i", [0])
+    for value in strings:
+        blob += (value or "").encode("utf-8")
+        offsets.append(len(blob))
+    return array("B", blob), offsets
+
+
+def _align(n):
+    return (n + 7) & ~7
@@ -0,0 +1,85 @@
+import argparse
+import csv
+import sys
+import time
+
+from maze import Maze
+
+
+def read_pairs(filename):
+    """
+    Yields (line number, pair, error) for each query in a file with one
+    pair per line, as four whitespace- or comma-separated numbers. The
+    pair is ((start row, start col), (goal row, goal col)), or None with
+    an error message if the line could not be read. Blank lines and
+    lines starting with "#" are skipped.
+    """
+    with open(filename) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.replace(",", " ").split()
+            if len(fields) != 4:
+                yield number, None, "expected 'start_row start_col goal_row goal_col'"
+                continue
+            try:
+                r1, c1, r2, c2 = (int(field) for field in fields)
+            except ValueError:
+                yield number, None, f"expected four integers, got {line!r}"
+                continue
+            yield number, ((r1, c1), (r2, c2)), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many start/goal queries on one maze.")
+    parser.add_argument("maze")
+    parser.add_argument("pairs", help="file of 'start_row start_col goal_row goal_col' lines")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the maze file into a packed wall grid")
+    parser.add_argument("--paths", action="store_true",
+                        help="include the actions of each path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    m = Maze.load_mapped(args.maze) if args.mmap else Maze(args.maze)
+    print(f"Maze loaded in {time.perf_counter() - start:.2f}s.", file=sys.stderr)
+
+    # Answer the queries goal by goal, so each goal's distance field is
+    # computed once however the queries are ordered, then write the rows
+    # back in the order they were asked
+    queries = list(read_pairs(args.pairs))
+    rows = [None] * len(queries)
+    blank = [""] * (5 + args.paths)
+    answerable = []
+    for index, (number, pair, error) in enumerate(queries):
+        if pair is None:
+            print(f"{args.pairs}:{number}: {error}", file=sys.stderr)
+            rows[index] = blank + [error]
+        else:
+            answerable.append(index)
+    start = time.perf_counter()
+    for index in sorted(answerable, key=lambda index: queries[index][1][1]):
+        number, (source, goal), _ = queries[index]
+        try:
+            field = m.distance_field(goal)
+            row = [*source, *goal, field.distance(source)]
+            if args.paths:
+                path = field.path(source)
+                row.append("" if path is None else " ".join(path[0]))
+            row.append("")
+        except Exception as e:
+            print(f"{args.pairs}:{number}: {e}", file=sys.stderr)
+            row = [*source, *goal, ""] + ([""] if args.paths else []) + [str(e)]
+        rows[index] = row
+
+    writer = csv.writer(sys.stdout)
+    header = ["start_row", "start_col", "goal_row", "goal_col", "length"]
+    writer.writerow(header + (["actions"] if args.paths else []) + ["error"])
+    writer.writerows(rows)
+    elapsed = time.perf_counter() - start
+    print(f"Answered {len(queries)} queries in {elapsed:.2f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import generator
+from maze import HEURISTICS, SOLVERS, Maze
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def run(filename, solver, heuristic="manhattan", trace=False, mapped=False):
+    """
+    Loads a maze file and solves it once with `solver`. Returns the
+    load time, solve time, explored count, path length and memory use.
+    """
+    start = time.perf_counter()
+    m = Maze.load_mapped(filename) if mapped else Maze(filename)
+    result = {"load_s": time.perf_counter() - start}
+
+    # Import NumPy up front so the wavefront solve time excludes it
+    if solver == "wavefront":
+        import numpy  # noqa: F401
+
+    if trace:
+        tracemalloc.start()
+    try:
+        m.solve(solver, HEURISTICS[heuristic])
+    except Exception as e:
+        result["error"] = str(e)
+    else:
+        result["solve_s"] = m.solve_time
+        result["explored"] = m.num_explored
+        result["length"] = len(m.solution[1])
+    if trace:
+        result["solve_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _run_in_child(filename, solver, heuristic, trace, mapped, queue):
+    queue.put(run(filename, solver, heuristic, trace, mapped))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze solvers on generated mazes.")
+    parser.add_argument("--sizes", default="100,1000,10000,100000,1000000,10000000",
+                        help="comma-separated target numbers of cells")
+    parser.add_argument("--style", choices=generator.STYLES, default="backtracker")
+    parser.add_argument("--solvers", default=",".join(SOLVERS),
+                        help="comma-separated solvers to run")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="manhattan")
+    parser.add_argument("--max-node-cells", type=int, default=1000000,
+                        help="skip node-based solvers above this many cells (wavefront always runs)")
+    parser.add_argument("--trace", action="store_true",
+                        help="trace Python allocations during each solve (slows the solve)")
+    parser.add_argument("--mmap", action="store_true",
+                        help="load mazes with Maze.load_mapped")
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--room-size", type=int, default=5)
+    parser.add_argument("--loops", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json",
+                        help="JSON results file")
+    parser.add_argument("--data", metavar="DIR",
+                        help="keep generated mazes under DIR instead of a temporary directory")
+    args = parser.parse_args()
+
+    solvers = args.solvers.split(",")
+    for solver in solvers:
+        if solver not in SOLVERS:
+            parser.error(f"unknown solver: {solver}")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as scratch:
+        root = args.data or scratch
+        os.makedirs(root, exist_ok=True)
+        for cells in (int(size) for size in args.sizes.split(",")):
+            height, width = generator.size_for_cells(cells)
+            filename = os.path.join(root, f"{args.style}-{cells}.txt")
+            print(f"Generating {args.style} maze with ~{cells} cells...", file=sys.stderr)
+            start = time.perf_counter()
+            lines = generator.generate(height, width, args.style, args.seed,
+                                       args.density, args.room_size, args.loops)
+            generator.write(filename, lines)
+            generate_s = time.perf_counter() - start
+            del lines
+
+            result = {
+                "config": {
+                    "cells": cells,
+                    "style": args.style,
+                    "seed": args.seed,
+                    "density": args.density,
+                    "room_size": args.room_size,
+                    "loops": args.loops,
+                    "mmap": args.mmap,
+                },
+                "generate_s": generate_s,
+                "solvers": {},
+            }
+            for solver in solvers:
+                if solver != "wavefront" and cells > args.max_node_cells:
+                    continue
+
+                # Solve in a fresh process so peak RSS is this solver's own
+                queue = multiprocessing.Queue()
+                child = multiprocessing.Process(
+                    target=_run_in_child, args=(filename, solver, args.heuristic, args.trace, args.mmap, queue))
+                child.start()
+                measured = queue.get()
+                child.join()
+                result["solvers"][solver] = measured
+                if "error" in measured:
+                    print(f"  {solver}: {measured['error']}", file=sys.stderr)
+                else:
+                    print(f"  {solver}: {measured['solve_s'] * 1000:.1f}ms, "
+                          f"{measured['explored']} explored, length {measured['length']}", file=sys.stderr)
+            runs.append(result)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "runs": runs}, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
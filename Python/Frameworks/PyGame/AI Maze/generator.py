@@ -0,0 +1,194 @@
+import argparse
+import math
+import random
+
+STYLES = ("backtracker", "prim", "rooms", "open")
+
+
+def generate(height, width, style="backtracker", seed=None, density=0.3, room_size=5, loops=0.05):
+    """
+    Returns a maze as a list of text lines in the maze.txt format:
+    "#" for walls, " " for open cells, "A" for the start and "B" for
+    the goal.
+
+    Styles:
+    - "backtracker": recursive backtracker, long winding corridors
+    - "prim": randomized Prim's algorithm, many short dead ends
+    - "rooms": open rooms of `room_size` cells joined by doorways
+    - "open": random walls at `density`, with one path guaranteed
+
+    `loops` is the chance of knocking out an extra wall in the
+    corridor styles, which adds alternative routes.
+    """
+    if style not in STYLES:
+        raise Exception(f"unknown style: {style}")
+    rng = random.Random(seed)
+
+    if style == "open":
+        walls, start, goal = _open(height, width, rng, density)
+    else:
+        # Corridor styles carve passages between cells on odd coordinates
+        step = room_size + 1 if style == "rooms" else 2
+        height = max(step + 1, (height - 1) // step * step + 1)
+        width = max(2 * step + 1, (width - 1) // step * step + 1)
+        walls = bytearray(b"#" * (height * width))
+        if style == "prim":
+            _prim(walls, height, width, rng)
+        else:
+            _backtracker(walls, height, width, rng, step)
+        _add_loops(walls, height, width, rng, loops, step)
+        start = (1, 1)
+        goal = (height - 2, width - 2)
+
+    walls[start[0] * width + start[1]] = ord("A")
+    walls[goal[0] * width + goal[1]] = ord("B")
+    return [walls[i * width:(i + 1) * width].decode("ascii") for i in range(height)]
+
+
+def _carve(walls, width, i, j, height=1, span=1):
+    for r in range(i, i + height):
+        walls[r * width + j:r * width + j + span] = b" " * span
+
+
+def _backtracker(walls, height, width, rng, step):
+    """
+    Carves a spanning tree of rooms (or single cells when step is 2)
+    with an iterative depth-first search.
+    """
+    size = step - 1
+    rows = (height - 1) // step
+    cols = (width - 1) // step
+    visited = bytearray(rows * cols)
+    stack = [(0, 0)]
+    visited[0] = 1
+    _carve(walls, width, 1, 1, size, size)
+    while stack:
+        r, c = stack[-1]
+        options = [
+            (r + dr, c + dc) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+            if 0 <= r + dr < rows and 0 <= c + dc < cols and not visited[(r + dr) * cols + c + dc]
+        ]
+        if not options:
+            stack.pop()
+            continue
+        nr, nc = rng.choice(options)
+        visited[nr * cols + nc] = 1
+        _carve(walls, width, 1 + nr * step, 1 + nc * step, size, size)
+        _open_door(walls, width, r, c, nr, nc, step, rng)
+        stack.append((nr, nc))
+
+
+def _prim(walls, height, width, rng):
+    """
+    Carves a spanning tree with randomized Prim's algorithm.
+    """
+    rows = (height - 1) // 2
+    cols = (width - 1) // 2
+    inside = bytearray(rows * cols)
+    inside[0] = 1
+    _carve(walls, width, 1, 1)
+    edges = [(0, 0, 1, 0), (0, 0, 0, 1)]
+    while edges:
+        k = rng.randrange(len(edges))
+        edges[k], edges[-1] = edges[-1], edges[k]
+        r, c, nr, nc = edges.pop()
+        if nr >= rows or nc >= cols or nr < 0 or nc < 0 or inside[nr * cols + nc]:
+            continue
+        inside[nr * cols + nc] = 1
+        _carve(walls, width, 1 + 2 * nr, 1 + 2 * nc)
+        _carve(walls, width, 1 + r + nr, 1 + c + nc)
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            edges.append((nr, nc, nr + dr, nc + dc))
+
+
+def _open_door(walls, width, r, c, nr, nc, step, rng):
+    """
+    Opens one cell in the wall between two neighbouring rooms.
+    """
+    size = step - 1
+    offset = rng.randrange(size)
+    if nr != r:
+        row = (max(r, nr)) * step
+        walls[row * width + 1 + c * step + offset] = ord(" ")
+    else:
+        col = (max(c, nc)) * step
+        walls[(1 + r * step + offset) * width + col] = ord(" ")
+
+
+def _add_loops(walls, height, width, rng, loops, step):
+    """
+    Opens random extra doors between rooms with probability `loops`.
+    """
+    if loops <= 0:
+        return
+    rows = (height - 1) // step
+    cols = (width - 1) // step
+    for r in range(rows):
+        for c in range(cols):
+            if r + 1 < rows and rng.random() < loops:
+                _open_door(walls, width, r, c, r + 1, c, step, rng)
+            if c + 1 < cols and rng.random() < loops:
+                _open_door(walls, width, r, c, r, c + 1, step, rng)
+
+
+def _open(height, width, rng, density):
+    """
+    Scatters walls at `density`, then carves a random monotone path
+    from the top-left to the bottom-right so the maze is solvable.
+    """
+    height = max(2, height)
+    width = max(2, width)
+    wall, space = ord("#"), ord(" ")
+    walls = bytearray(wall if rng.random() < density else space for _ in range(height * width))
+    r, c = 0, 0
+    goal = (height - 1, width - 1)
+    while (r, c) != goal:
+        walls[r * width + c] = ord(" ")
+        if c == goal[1] or (r < goal[0] and rng.random() < (goal[0] - r) / (goal[0] - r + goal[1] - c)):
+            r += 1
+        else:
+            c += 1
+    return walls, (0, 0), goal
+
+
+def write(filename, lines):
+    """
+    Writes maze lines to a file.
+    """
+    with open(filename, "w") as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+
+
+def size_for_cells(cells):
+    """
+    Returns a (height, width) close to square with about `cells` cells.
+    """
+    side = max(3, int(math.isqrt(cells)))
+    return side, max(3, cells // side)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a maze text file.")
+    parser.add_argument("output")
+    parser.add_argument("--cells", type=int, help="target number of cells (overrides height/width)")
+    parser.add_argument("--height", type=int, default=21)
+    parser.add_argument("--width", type=int, default=41)
+    parser.add_argument("--style", choices=STYLES, default="backtracker")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--density", type=float, default=0.3,
+                        help="wall density for the open style")
+    parser.add_argument("--room-size", type=int, default=5,
+                        help="room width in cells for the rooms style")
+    parser.add_argument("--loops", type=float, default=0.05,
+                        help="chance of extra doors in corridor styles")
+    args = parser.parse_args()
+
+    height, width = size_for_cells(args.cells) if args.cells else (args.height, args.width)
+    lines = generate(height, width, args.style, args.seed, args.density, args.room_size, args.loops)
+    write(args.output, lines)
+    print(f"Wrote {len(lines)}x{len(lines[0])} {args.style} maze to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
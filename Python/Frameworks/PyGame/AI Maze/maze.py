@@ -1,4 +1,10 @@
-import sys
+import argparse
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict, deque
 
 class Node():
     def __init__(self, state, parent, action):
@@ -9,13 +15,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of frontier nodes holding each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self._track(node)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,10 +33,20 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._untrack(node)
             return node
 
+    def _track(self, node):
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _untrack(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -35,10 +54,157 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._untrack(node)
             return node
 
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first,
+    breaking ties in insertion order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = itertools.count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self._track(node)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, node = heapq.heappop(self.frontier)
+            self._untrack(node)
+            return node
+
+
+def manhattan(state, goal):
+    """Number of grid steps between two cells, ignoring walls."""
+    return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+
+def euclidean(state, goal):
+    """Straight-line distance between two cells."""
+    return math.hypot(state[0] - goal[0], state[1] - goal[1])
+
+
+def zero(state, goal):
+    """Uninformed heuristic; turns A* into uniform-cost search."""
+    return 0
+
+
+HEURISTICS = {
+    "manhattan": manhattan,
+    "euclidean": euclidean,
+    "zero": zero,
+}
+
+SOLVERS = ("dfs", "bfs", "greedy", "astar", "wavefront", "jps")
+
+# Codes stored in the wavefront direction array for the move into a cell
+DIRECTIONS = (
+    # code, action, row step, column step
+    (1, "up", -1, 0),
+    (2, "down", 1, 0),
+    (3, "left", 0, -1),
+    (4, "right", 0, 1),
+)
+
+# Bytes of a mapped maze file scanned at a time by Maze.load_mapped
+LOAD_CHUNK_SIZE = 1 << 20
+
+# Distance fields kept per maze by Maze.distance_field
+FIELD_CACHE_SIZE = 16
+
+# Image rendering: cell size and border in pixels, and palette indexes
+CELL_SIZE = 50
+CELL_BORDER = 2
+BACKGROUND_COLOR, WALL_COLOR, START_COLOR, GOAL_COLOR, SOLUTION_COLOR, EXPLORED_COLOR, EMPTY_COLOR = range(7)
+PALETTE = [
+    0, 0, 0,
+    40, 40, 40,
+    255, 0, 0,
+    0, 171, 28,
+    220, 235, 113,
+    212, 97, 85,
+    237, 240, 252,
+]
+
+
+class CellMask():
+    """
+    Set-like view of the True cells of a NumPy boolean array.
+    """
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __contains__(self, cell):
+        return bool(self.mask[cell])
+
+    def __len__(self):
+        return int(self.mask.sum())
+
+    def __iter__(self):
+        for i, j in zip(*self.mask.nonzero()):
+            yield int(i), int(j)
+
+
+class DistanceField():
+    """
+    Breadth-first distances from every cell to one goal, and the first
+    move of a shortest path from each cell towards it.
+    """
+
+    def __init__(self, goal, distances, moves):
+        self.goal = goal
+        # Steps to the goal, -1 where the goal is unreachable
+        self.distances = distances
+        # Direction code of the move towards the goal
+        self.moves = moves
+
+    def distance(self, start):
+        """
+        Returns the number of steps from `start` to the goal, or None.
+        Raises ValueError if `start` is outside the maze.
+        """
+        start = self._check(start)
+        steps = int(self.distances[start])
+        return None if steps < 0 else steps
+
+    def path(self, start):
+        """
+        Returns (actions, cells) from `start` to the goal in the same
+        form as Maze.solution, or None if the goal is unreachable.
+        """
+        start = self._check(start)
+        if self.distance(start) is None:
+            return None
+        moves = {code: (action, dr, dc) for code, action, dr, dc in DIRECTIONS}
+        actions = []
+        cells = []
+        state = start
+        while state != self.goal:
+            action, dr, dc = moves[int(self.moves[state])]
+            state = (state[0] + dr, state[1] + dc)
+            actions.append(action)
+            cells.append(state)
+        return actions, cells
+
+    def _check(self, start):
+        # Negative indexes would wrap around to another cell
+        height, width = self.distances.shape
+        start = tuple(start)
+        if len(start) != 2 or not (0 <= start[0] < height and 0 <= start[1] < width):
+            raise ValueError(f"start {start} is outside the {height}x{width} maze")
+        return start
+
+
 class Maze():
 
     def __init__(self, filename):
@@ -59,7 +225,7 @@ class Maze():
         self.width = max(len(line) for line in contents)
 
         # Keep track of walls
-        self.walls = []
+        walls = []
         for i in range(self.height):
             row = []
             for j in range(self.width):
@@ -76,10 +242,124 @@ class Maze():
                         row.append(True)
                 except IndexError:
                     row.append(False)
-            self.walls.append(row)
+            walls.append(tuple(row))
 
+        self._walls = tuple(walls)
+        self._grid = None
+        self._bits = None
+        self._fields = OrderedDict()
         self.solution = None
 
+    @classmethod
+    def from_grid(cls, grid, start, goal):
+        """
+        Creates a maze from a NumPy boolean wall grid without building
+        the rows-of-booleans wall representation. The grid is copied.
+        """
+        import numpy as np
+
+        maze = cls.__new__(cls)
+        maze.height, maze.width = grid.shape
+        maze.start = start
+        maze.goal = goal
+        maze._walls = None
+        maze._grid = _read_only(np.array(grid, dtype=bool))
+        maze._bits = None
+        maze._fields = OrderedDict()
+        maze.solution = None
+        return maze
+
+    @classmethod
+    def load_mapped(cls, filename, chunk_size=LOAD_CHUNK_SIZE):
+        """
+        Creates a maze by memory-mapping a maze file. One pass over the
+        mapped bytes finds the line ends, the start and the goal, and a
+        second packs each row's walls into bits, so the file is never
+        decoded into Python strings.
+        """
+        import mmap
+
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise Exception("maze must have exactly one start point")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            lines, start, goal = _scan_mapped(mapped, chunk_size)
+            bits = _pack_mapped(mapped, lines, chunk_size)
+        finally:
+            mapped.close()
+
+        maze = cls.__new__(cls)
+        maze.height = len(lines[0])
+        maze.width = int(lines[1].max())
+        maze.start = start
+        maze.goal = goal
+        maze._walls = None
+        maze._grid = None
+        maze._bits = _read_only(bits)
+        maze._fields = OrderedDict()
+        maze.solution = None
+        return maze
+
+    # The wall representations are read-only and built from each other on
+    # demand; walls change only through the setters or set_wall, which
+    # drop every derived representation and cached distance field
+
+    @property
+    def walls(self):
+        """Walls as a tuple of rows of booleans."""
+        if self._walls is None:
+            self._walls = tuple(map(tuple, self.grid.tolist()))
+        return self._walls
+
+    @walls.setter
+    def walls(self, walls):
+        self._set_walls(tuple(tuple(bool(cell) for cell in row) for row in walls), None)
+
+    @property
+    def grid(self):
+        """Walls as a read-only NumPy boolean array of shape (height, width)."""
+        if self._grid is None:
+            import numpy as np
+            if self._bits is not None:
+                grid = np.unpackbits(self._bits, axis=1, count=self.width).view(bool)
+            else:
+                grid = np.array(self._walls, dtype=bool).reshape(self.height, self.width)
+            self._grid = _read_only(grid)
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid):
+        import numpy as np
+        self._set_walls(None, _read_only(np.array(grid, dtype=bool)))
+
+    def set_wall(self, cell, wall=True):
+        """
+        Makes `cell` a wall, or an open cell if `wall` is False.
+        """
+        grid = self.grid.copy()
+        grid[cell] = wall
+        self._set_walls(None, _read_only(grid))
+
+    def _set_walls(self, walls, grid):
+        if walls is not None and len({len(row) for row in walls}) > 1:
+            raise Exception("maze rows must all have the same width")
+        shape = (len(walls), len(walls[0]) if walls else 0) if walls is not None else grid.shape
+        if shape != (self.height, self.width):
+            raise Exception(f"walls must have shape {(self.height, self.width)}, not {shape}")
+        self._walls = walls
+        self._grid = grid
+        self._bits = None
+        self._fields.clear()
+
+    @property
+    def bits(self):
+        """Walls packed eight cells to a byte, one padded row per maze row (read-only)."""
+        if self._bits is None:
+            import numpy as np
+            self._bits = _read_only(np.packbits(self.grid, axis=1))
+        return self._bits
+
 
     def print(self):
         solution = self.solution[1] if self.solution is not None else None
@@ -116,16 +396,44 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, solver="dfs", heuristic=manhattan):
+        """
+        Finds a solution to maze, if one exists.
+
+        `solver` is one of "dfs", "bfs", "greedy" (greedy best-first),
+        "astar", "wavefront" (vectorized BFS on the NumPy grid) or "jps"
+        (A* over jump points), and informed solvers rank cells by
+        `heuristic(state, goal)`.
+        """
+        if solver not in SOLVERS:
+            raise Exception(f"unknown solver: {solver}")
+        start_time = time.perf_counter()
+        if solver == "wavefront":
+            self._solve_wavefront()
+            self.solve_time = time.perf_counter() - start_time
+            return
+        if solver == "jps":
+            self._solve_jps(heuristic)
+            self.solve_time = time.perf_counter() - start_time
+            return
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        if solver == "dfs":
+            frontier = StackFrontier()
+            frontier.add(start)
+        elif solver == "bfs":
+            frontier = QueueFrontier()
+            frontier.add(start)
+        else:
+            frontier = PriorityFrontier()
+            frontier.add(start, heuristic(self.start, self.goal))
+
+        # Cheapest known number of steps to each cell, for A*
+        cost = {self.start: 0}
 
         # Initialize an empty explored set
         self.explored = set()
@@ -137,8 +445,11 @@ class Maze():
             if frontier.empty():
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
+            # Choose a node from the frontier, skipping cells A* has
+            # already reached more cheaply
             node = frontier.remove()
+            if node.state in self.explored:
+                continue
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
@@ -152,6 +463,7 @@ class Maze():
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.solve_time = time.perf_counter() - start_time
                 return
 
             # Mark node as explored
@@ -159,71 +471,427 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
+                if state in self.explored:
+                    continue
+                if solver == "astar":
+                    steps = cost[node.state] + 1
+                    if steps < cost.get(state, math.inf):
+                        cost[state] = steps
+                        child = Node(state=state, parent=node, action=action)
+                        frontier.add(child, steps + heuristic(state, self.goal))
+                elif not frontier.contains_state(state):
                     child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+                    if solver == "greedy":
+                        frontier.add(child, heuristic(state, self.goal))
+                    else:
+                        frontier.add(child)
+
+
+    def _solve_wavefront(self):
+        """
+        Breadth-first search that expands a whole frontier at once with
+        shifted index arrays over the flattened NumPy grid, recording the
+        move into each cell in an int8 direction array instead of
+        creating a Node per cell.
+        """
+        directions, expanded, _ = self._wavefront(self.start, stop=self.goal)
+        if not directions[self.goal] and self.goal != self.start:
+            raise Exception("no solution")
+        self.num_explored = int(expanded.sum()) + 1
+
+        # Walk the direction array back from the goal
+        moves = {code: (action, dr, dc) for code, action, dr, dc in DIRECTIONS}
+        actions = []
+        cells = []
+        state = self.goal
+        while state != self.start:
+            action, dr, dc = moves[int(directions[state])]
+            actions.append(action)
+            cells.append(state)
+            state = (state[0] - dr, state[1] - dc)
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+        self.explored = CellMask(expanded)
+
+    def _wavefront(self, source, stop=None, distances=False):
+        """
+        Expands whole BFS levels from `source` until `stop` is reached or
+        every reachable cell is visited. Returns the direction code of the
+        move into each cell, the mask of expanded cells and, if asked for,
+        each cell's distance from `source` (-1 where unreachable).
+        """
+        import numpy as np
+
+        width = self.width
+        size = self.height * width
+        open_cells = ~self.grid.ravel()
+        visited = np.zeros(size, dtype=bool)
+        expanded = np.zeros(size, dtype=bool)
+        directions = np.zeros(size, dtype=np.int8)
+        distance = np.full(size, -1, dtype=np.int32) if distances else None
+        source = source[0] * width + source[1]
+        stop = -1 if stop is None else stop[0] * width + stop[1]
+
+        frontier = np.array([source], dtype=np.intp)
+        visited[source] = True
+        level = 0
+
+        while frontier.size and not (stop >= 0 and visited[stop]):
+            expanded[frontier] = True
+            if distances:
+                distance[frontier] = level
+            level += 1
+
+            columns = frontier % width
+            steps = []
+            for code, _, dr, dc in DIRECTIONS:
+                # Shift the frontier one cell, dropping moves off the grid
+                if dr == -1:
+                    cells = frontier[frontier >= width] - width
+                elif dr == 1:
+                    cells = frontier[frontier < size - width] + width
+                elif dc == -1:
+                    cells = frontier[columns != 0] - 1
+                else:
+                    cells = frontier[columns != width - 1] + 1
+                cells = cells[open_cells[cells] & ~visited[cells]]
+                visited[cells] = True
+                directions[cells] = code
+                steps.append(cells)
+            frontier = np.concatenate(steps)
+
+        shape = (self.height, width)
+        if distances:
+            distance[frontier] = level
+            distance = distance.reshape(shape)
+        return directions.reshape(shape), expanded.reshape(shape), distance
+
+    def distance_field(self, goal=None):
+        """
+        Returns the DistanceField to `goal` (the maze goal by default),
+        computed with one full wavefront from the goal and cached on
+        the maze until its walls are changed.
+        """
+        import numpy as np
+
+        goal = self.goal if goal is None else tuple(goal)
+        try:
+            field = self._fields[goal]
+        except KeyError:
+            pass
+        else:
+            self._fields.move_to_end(goal)
+            return field
+
+        if not (0 <= goal[0] < self.height and 0 <= goal[1] < self.width) or self.grid[goal]:
+            raise Exception(f"goal {goal} is not an open cell")
+        directions, _, distances = self._wavefront(goal, distances=True)
+        # Every cell was entered from its neighbour nearer the goal, so the
+        # way back is the opposite move: up/down and left/right swap codes
+        opposite = np.array([0, 2, 1, 4, 3], dtype=np.int8)
+        field = DistanceField(goal, distances, opposite[directions])
+        self._fields[goal] = field
+        if len(self._fields) > FIELD_CACHE_SIZE:
+            self._fields.popitem(last=False)
+        return field
+
+    def shortest_path(self, start, goal=None):
+        """
+        Returns (actions, cells) for a shortest path from `start` to
+        `goal` (the maze goal by default), or None if there is none,
+        reusing the cached distance field to the goal.
+        """
+        return self.distance_field(goal).path(tuple(start))
+
+    def _solve_jps(self, heuristic):
+        """
+        A* that only puts jump points on the frontier, using the
+        4-connected Jump Point Search rules: horizontal moves run on until
+        a cell above or below opens up past a wall, and vertical moves
+        scan left and right at every step, stopping where a scan finds
+        a jump point. The cells between jump points are filled back in
+        when the path is rebuilt, so the path is the same length as BFS.
+        """
+        walls = self.walls
+        height, width = self.height, self.width
+        goal = self.goal
+
+        def is_open(r, c):
+            return 0 <= r < height and 0 <= c < width and not walls[r][c]
+
+        def forced(r, c, dc):
+            # A cell above or below that was walled off one step back
+            return ((is_open(r - 1, c) and not is_open(r - 1, c - dc))
+                    or (is_open(r + 1, c) and not is_open(r + 1, c - dc)))
+
+        def jump_horizontal(r, c, dc):
+            while True:
+                c += dc
+                if not is_open(r, c):
+                    return None
+                if (r, c) == goal or forced(r, c, dc):
+                    return (r, c)
+
+        def jump_vertical(r, c, dr):
+            while True:
+                r += dr
+                if not is_open(r, c):
+                    return None
+                if (r, c) == goal or jump_horizontal(r, c, -1) or jump_horizontal(r, c, 1):
+                    return (r, c)
+
+        def directions(node):
+            r, c = node.state
+            if node.parent is None:
+                return [(-1, 0), (1, 0), (0, -1), (0, 1)]
+            dr, dc = _sign(r - node.parent.state[0]), _sign(c - node.parent.state[1])
+            if dr:
+                return [(dr, 0), (0, -1), (0, 1)]
+            result = [(0, dc)]
+            for side in (-1, 1):
+                if is_open(r + side, c) and not is_open(r + side, c - dc):
+                    result.append((side, 0))
+            return result
+
+        actions = {(dr, dc): action for _, action, dr, dc in DIRECTIONS}
+        self.num_explored = 0
+        self.explored = set()
+        cost = {self.start: 0}
+        frontier = PriorityFrontier()
+        frontier.add(Node(state=self.start, parent=None, action=None), heuristic(self.start, goal))
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            if node.state == goal:
+                break
+            self.explored.add(node.state)
 
-                # Empty cell
+            r, c = node.state
+            for dr, dc in directions(node):
+                if dr:
+                    point = jump_vertical(r, c, dr)
                 else:
-                    fill = (237, 240, 252)
+                    point = jump_horizontal(r, c, dc)
+                if point is None or point in self.explored:
+                    continue
+                steps = cost[node.state] + abs(point[0] - r) + abs(point[1] - c)
+                if steps < cost.get(point, math.inf):
+                    cost[point] = steps
+                    child = Node(state=point, parent=node, action=actions[(dr, dc)])
+                    frontier.add(child, steps + heuristic(point, goal))
+
+        # Fill in the cells between consecutive jump points
+        moves = []
+        cells = []
+        while node.parent is not None:
+            (r, c), (pr, pc) = node.state, node.parent.state
+            dr, dc = _sign(r - pr), _sign(c - pc)
+            while (r, c) != (pr, pc):
+                moves.append(node.action)
+                cells.append((r, c))
+                r, c = r - dr, c - dc
+            node = node.parent
+        moves.reverse()
+        cells.reverse()
+        self.solution = (moves, cells)
 
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
+    def output_image(self, filename, show_solution=True, show_explored=False):
+        from PIL import Image
 
+        index = self._color_index(show_solution, show_explored)
+        img = Image.fromarray(self._render_cells(index))
+        img.putpalette(PALETTE)
         img.save(filename)
 
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+    def output_tiles(self, directory, tile_cells=256, show_solution=True, show_explored=False):
+        """
+        Writes the maze image as PNG tiles of `tile_cells` x `tile_cells`
+        cells named tile_<row>_<col>.png, so only one tile is ever held
+        in memory as pixels.
+        """
+        from PIL import Image
+
+        os.makedirs(directory, exist_ok=True)
+        index = self._color_index(show_solution, show_explored)
+        for tile_row, i in enumerate(range(0, self.height, tile_cells)):
+            for tile_col, j in enumerate(range(0, self.width, tile_cells)):
+                img = Image.fromarray(self._render_cells(index[i:i + tile_cells, j:j + tile_cells]))
+                img.putpalette(PALETTE)
+                img.save(os.path.join(directory, f"tile_{tile_row}_{tile_col}.png"))
+
+    def _color_index(self, show_solution, show_explored):
+        """
+        Returns a uint8 array of PALETTE color indexes, one per cell.
+        """
+        import numpy as np
+
+        index = np.full((self.height, self.width), EMPTY_COLOR, dtype=np.uint8)
+        if self.solution is not None:
+            if show_explored:
+                explored = self.explored
+                if isinstance(explored, CellMask):
+                    index[explored.mask] = EXPLORED_COLOR
+                elif explored:
+                    rows, cols = zip(*explored)
+                    index[list(rows), list(cols)] = EXPLORED_COLOR
+            if show_solution and self.solution[1]:
+                rows, cols = zip(*self.solution[1])
+                index[list(rows), list(cols)] = SOLUTION_COLOR
+        index[self.goal] = GOAL_COLOR
+        index[self.start] = START_COLOR
+        index[self.grid] = WALL_COLOR
+        return index
+
+    def _render_cells(self, index):
+        """
+        Upscales a block of cell color indexes to pixels, leaving a
+        background-colored border around every cell.
+        """
+        import numpy as np
+
+        # Pixels inside a cell, matching the original per-cell rectangles
+        inside = np.zeros(CELL_SIZE, dtype=bool)
+        inside[CELL_BORDER:CELL_SIZE - CELL_BORDER + 1] = True
+
+        pixels = np.repeat(np.repeat(index, CELL_SIZE, axis=0), CELL_SIZE, axis=1)
+        rows = np.tile(inside, index.shape[0])
+        cols = np.tile(inside, index.shape[1])
+        pixels[~rows, :] = BACKGROUND_COLOR
+        pixels[:, ~cols] = BACKGROUND_COLOR
+        return pixels
+
+
+def _scan_mapped(mapped, chunk_size):
+    """
+    Scans a mapped maze file in cache-sized chunks, returning
+    ((line starts, line lengths), start, goal).
+    """
+    import numpy as np
+
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    ends, starts, goals = [], [], []
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset:offset + chunk_size]
+        ends.append(np.flatnonzero(chunk == ord("\n")) + offset)
+        starts.append(np.flatnonzero(chunk == ord("A")) + offset)
+        goals.append(np.flatnonzero(chunk == ord("B")) + offset)
+    ends = np.concatenate(ends)
+    starts = np.concatenate(starts)
+    goals = np.concatenate(goals)
+
+    # A last line without a newline ends at the end of the file
+    if data[-1] != ord("\n"):
+        ends = np.append(ends, len(data))
+    line_starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - line_starts
+    carriage = lengths > 0
+    carriage[carriage] = data[ends[carriage] - 1] == ord("\r")
+    lengths[carriage] -= 1
+
+    # Drop views of the mapping before raising, so it can be closed
+    del data, chunk
+    if len(starts) != 1:
+        raise Exception("maze must have exactly one start point")
+    if len(goals) != 1:
+        raise Exception("maze must have exactly one goal")
+
+    def cell(position):
+        row = int(np.searchsorted(ends, position))
+        return (row, int(position - line_starts[row]))
+
+    return (line_starts, lengths), cell(starts[0]), cell(goals[0])
+
+
+def _pack_mapped(mapped, lines, chunk_size):
+    """
+    Packs the walls of a mapped maze file into a bit array with one
+    row per line. Cells past the end of a short line are open.
+    """
+    import numpy as np
+
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    line_starts, lengths = lines
+    height = len(line_starts)
+    width = int(lengths.max())
+    bits = np.zeros((height, (width + 7) // 8), dtype=np.uint8)
+
+    def walls(cells):
+        return (cells != ord(" ")) & (cells != ord("A")) & (cells != ord("B"))
+
+    # Lines of equal length can be reshaped in blocks; the last line may
+    # be missing its newline, so it is always packed on its own
+    row = 0
+    stride = int(line_starts[1]) if height > 1 else 0
+    if height > 1 and (lengths == width).all() and (np.diff(line_starts) == stride).all():
+        block = max(1, chunk_size // stride)
+        while row < height - 1:
+            count = min(block, height - 1 - row)
+            cells = data[row * stride:(row + count) * stride].reshape(count, stride)[:, :width]
+            bits[row:row + count] = np.packbits(walls(cells), axis=1)
+            row += count
+    for row in range(row, height):
+        start = int(line_starts[row])
+        packed = np.packbits(walls(data[start:start + int(lengths[row])]))
+        bits[row, :len(packed)] = packed
+    return bits
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a maze text file.")
+    parser.add_argument("maze")
+    parser.add_argument("--solver", choices=SOLVERS, default="dfs")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="manhattan")
+    parser.add_argument("--compare", action="store_true",
+                        help="solve with every solver and compare them")
+    parser.add_argument("--tiles", metavar="DIR",
+                        help="write the solution image as PNG tiles in DIR instead of maze.png")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the maze file into a packed wall grid")
+    args = parser.parse_args()
+
+    m = Maze.load_mapped(args.maze) if args.mmap else Maze(args.maze)
+    heuristic = HEURISTICS[args.heuristic]
+
+    if args.compare:
+        # Build the NumPy wall grid up front, as benchmark.py does, so the
+        # wavefront time excludes the import and the one-off grid build
+        m.grid
+        print(f"{'Solver':<8}{'Explored':>10}{'Length':>8}{'Time (ms)':>12}")
+        for solver in SOLVERS:
+            m.solve(solver, heuristic)
+            print(f"{solver:<8}{m.num_explored:>10}{len(m.solution[1]):>8}{m.solve_time * 1000:>12.3f}")
+        return
+
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.solver, heuristic)
+    print("States Explored:", m.num_explored)
+    print("Path Length:", len(m.solution[1]))
+    print(f"Solve Time: {m.solve_time * 1000:.3f} ms")
+    print("Solution:")
+    m.print()
+    if args.tiles:
+        m.output_tiles(args.tiles, show_explored=True)
+    else:
+        m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
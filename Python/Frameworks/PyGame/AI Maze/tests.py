@@ -0,0 +1,51 @@
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+
+MAZE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Mazes", "maze1.txt")
+
+
+class BatchTests(unittest.TestCase):
+    def run_batch(self, pairs):
+        """
+        Runs the batch CLI on maze1 with the given pairs file contents
+        and returns the CSV rows it writes, header first.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "pairs.txt")
+            with open(filename, "w") as f:
+                f.write(pairs)
+            out = io.StringIO()
+            with mock.patch.object(sys, "argv", ["batch.py", MAZE, filename]), \
+                    contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+                batch.main()
+        return list(csv.reader(io.StringIO(out.getvalue())))
+
+    def test_bad_lines_are_reported_per_row(self):
+        rows = self.run_batch("5 0 0 5\n5 0 0\n5,0,x,5\n# comment\n\n5 0 4 0\n")
+        header, rows = rows[0], rows[1:]
+        self.assertEqual(header[-1], "error")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], ["5", "0", "0", "5", "10", ""])
+        self.assertEqual(rows[1][:5], [""] * 5)
+        self.assertIn("expected", rows[1][-1])
+        self.assertEqual(rows[2][:5], [""] * 5)
+        self.assertIn("integers", rows[2][-1])
+        self.assertEqual(rows[3], ["5", "0", "4", "0", "1", ""])
+
+    def test_unanswerable_queries_are_reported_per_row(self):
+        rows = self.run_batch("9 9 0 5\n5 0 0 0\n5 0 0 5\n")[1:]
+        self.assertIn("outside", rows[0][-1])
+        self.assertIn("not an open cell", rows[1][-1])
+        self.assertEqual(rows[2], ["5", "0", "0", "5", "10", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mcts
+import tictactoe as ttt
+
+# Players the arena can pit against each other: the runner's difficulty
+# levels, plus a player that picks uniformly random moves
+PLAYERS = tuple(difficulty.lower() for difficulty in ttt.DIFFICULTIES) + ("random",)
+
+# Latency percentiles reported for each player
+PERCENTILES = (50, 90, 99)
+
+
+def play_game(first, second, size, first_is_x, rng):
+    """
+    Plays one game between two players and returns (winner, moves), where
+    winner is 0 for `first`, 1 for `second` or None for a draw, and moves
+    lists (player, action, seconds, nodes) for every move made. nodes
+    is None for moves whose player reported no search count.
+    """
+    names = (first, second) if first_is_x else (second, first)
+    board = ttt.initial_state(size)
+    moves = []
+    while not ttt.terminal(board):
+        turn = 0 if ttt.player(board) == ttt.X else 1
+        name = names[turn]
+        start = time.perf_counter()
+        if name == "random":
+            ttt.last_stats.clear()
+            action = rng.choice(ttt.actions(board))
+        else:
+            action = ttt.ai_move(board, name.capitalize())
+        seconds = time.perf_counter() - start
+        nodes = ttt.last_stats.get("nodes", ttt.last_stats.get("playouts"))
+        moves.append((turn if first_is_x else 1 - turn, action, seconds, nodes))
+        board = ttt.result(board, action)
+
+    win = ttt.winner(board)
+    if win is None:
+        return None, moves
+    x_won = win == ttt.X
+    return (0 if x_won == first_is_x else 1), moves
+
+
+def play_games(first, second, size, games, seed, time_budget):
+    """
+    Plays the games numbered in `games` in this process. The first player
+    is X in even-numbered games and O in odd-numbered ones.
+    """
+    ttt.TIME_BUDGET = time_budget
+
+    # Seed the MCTS players so a run can be repeated. Each searches in
+    # one process, since the arena already plays games in parallel
+    for difficulty, budget in ttt.MCTS_BUDGETS.items():
+        key = (size, difficulty)
+        if key not in ttt.mcts_players:
+            ttt.mcts_players[key] = mcts.MCTSPlayer(
+                size, ttt.win_length(size), seed=seed * 1000003 + games[0], **dict(budget, workers=1))
+
+    results = []
+    for number in games:
+        rng = random.Random(seed * 1000003 + number)
+        results.append((number, *play_game(first, second, size, number % 2 == 0, rng)))
+    return results
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of sorted values by the nearest-rank method.
+    """
+    if not values:
+        return 0
+    rank = -(-p * len(values) // 100)
+    return values[max(rank, 1) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play tic-tac-toe engines against each other without pygame.")
+    parser.add_argument("first", choices=PLAYERS)
+    parser.add_argument("second", choices=PLAYERS)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--size", type=int, choices=ttt.BOARD_SIZES, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes playing games in parallel")
+    parser.add_argument("--time", type=float, default=ttt.TIME_BUDGET,
+                        help="seconds per perfect-player move on boards larger than 3x3")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Deal out games in chunks so each process reuses its search tables
+    numbers = list(range(args.games))
+    chunk = max(1, -(-args.games // (args.workers * 4)))
+    chunks = [numbers[i:i + chunk] for i in range(0, args.games, chunk)]
+
+    start = time.perf_counter()
+    results = []
+    try:
+        if args.workers > 1:
+            with ProcessPoolExecutor(args.workers) as pool:
+                futures = [pool.submit(play_games, args.first, args.second, args.size, games, args.seed, args.time)
+                           for games in chunks]
+                for future in futures:
+                    results.extend(future.result())
+        else:
+            for games in chunks:
+                results.extend(play_games(args.first, args.second, args.size, games, args.seed, args.time))
+    finally:
+        ttt.close_players()
+    seconds = time.perf_counter() - start
+
+    print(f"{args.first} vs {args.second} on {args.size}x{args.size}: "
+          f"{args.games} games, {args.workers} workers, {seconds:.1f}s")
+    names = (args.first, args.second)
+    header = f"{'player':<18}{'wins':>8}{'draws':>8}{'losses':>8}{'nodes/move':>12}"
+    header += "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES) + f"{'max ms':>10}"
+    print(header)
+    for slot in (0, 1):
+        wins = sum(1 for _, winner, _ in results if winner == slot)
+        draws = sum(1 for _, winner, _ in results if winner is None)
+        losses = len(results) - wins - draws
+        mine = [move for _, _, moves in results for move in moves if move[0] == slot]
+        latencies = sorted(seconds * 1000 for _, _, seconds, _ in mine)
+        counts = [count for _, _, _, count in mine if count is not None]
+        label = f"{names[slot]} ({'first' if slot == 0 else 'second'})"
+        line = f"{label:<18}{wins / len(results):>8.1%}{draws / len(results):>8.1%}{losses / len(results):>8.1%}"
+        line += f"{sum(counts) / len(counts):>12.0f}" if counts else f"{'n/a':>12}"
+        line += "".join(f"{percentile(latencies, p):>10.2f}" for p in PERCENTILES)
+        line += f"{(latencies[-1] if latencies else 0):>10.2f}"
+        print(line)
+
+    # Regression check: on 3x3 the perfect player must never lose
+    if args.size == 3 and "perfect" in names:
+        lost = [(number, moves) for number, winner, moves in results
+                if winner is not None and names[1 - winner] == "perfect"]
+        if lost:
+            number, moves = lost[0]
+            print(f"FAIL: perfect lost {len(lost)} games; game {number}: "
+                  + " ".join(f"{i},{j}" for _, (i, j), _, _ in moves))
+            sys.exit(1)
+        print(f"OK: perfect lost none of {len(results)} games")
+
+
+if __name__ == "__main__":
+    main()
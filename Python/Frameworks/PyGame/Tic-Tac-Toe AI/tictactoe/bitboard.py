@@ -0,0 +1,119 @@
+X = "X"
+O = "O"
+EMPTY = None
+
+# A bitboard is a pair (x, o) of 9-bit integers, where bit i * 3 + j
+# is set if that player has a mark in row i, column j
+FULL = (1 << 9) - 1
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Number of marks in each 9-bit mask
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(FULL + 1))
+
+
+def initial_state():
+    """
+    Returns starting state of the bitboard.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard for a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * 3 + j)
+            elif cell == O:
+                o |= 1 << (i * 3 + j)
+    return (x, o)
+
+
+def to_board(bits):
+    """
+    Returns the list-of-lists board for a bitboard.
+    """
+    x, o = bits
+    return [
+        [X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1 else EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def cell(index):
+    """
+    Returns the (i, j) action for a bit index.
+    """
+    return divmod(index, 3)
+
+
+def player(bits):
+    """
+    Returns player who has the next turn on a bitboard.
+    """
+    x, o = bits
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def actions(bits):
+    """
+    Returns the bit indexes of the empty cells, in row-major order.
+    """
+    taken = bits[0] | bits[1]
+    return [index for index in range(9) if not taken >> index & 1]
+
+
+def result(bits, index):
+    """
+    Returns the bitboard that results from the current player
+    marking bit `index`.
+    """
+    x, o = bits
+    move = 1 << index
+    if (x | o) & move:
+        raise Exception("Invalid action")
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return (x | move, o)
+    return (x, o | move)
+
+
+def winner(bits):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = bits
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def terminal(bits):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (bits[0] | bits[1]) == FULL or winner(bits) is not None
+
+
+def utility(bits):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    win = winner(bits)
+    if win == X:
+        return 1
+    elif win == O:
+        return -1
+    else:
+        return 0
@@ -0,0 +1,309 @@
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Cell codes used inside the search
+MARKS = {EMPTY: 0, X: 1, O: 2}
+
+# Directions a line can run in: right, down, down-right, down-left
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Scores at or above this are forced wins, less the plies they take
+WIN = 10 ** 9
+
+# Most plies a forced win can take, on boards up to 32×32: scores within
+# this of WIN are wins, and anything below is a heuristic score
+MATE_WINDOW = 32 * 32
+
+# Transposition table entries kept before the table is cleared
+TABLE_LIMIT = 1 << 20
+
+
+class Timeout(Exception):
+    pass
+
+
+class Engine():
+    """
+    Iterative-deepening alpha-beta search for k-in-a-row on an N×N board.
+
+    Every line of k cells is a window. The search keeps how many X's and
+    O's each window holds, so a move updates only the windows through its
+    cell: that gives the heuristic score and detects a win from the last
+    move without scanning the board.
+    """
+
+    def __init__(self, size, k, branch_limit=None):
+        if size * size > MATE_WINDOW:
+            raise Exception(f"Boards larger than {MATE_WINDOW} cells are not supported")
+        self.size = size
+        self.k = k
+        # Widest set of moves searched at each node, best-ordered first;
+        # None searches every candidate, which keeps small boards exact
+        self.branch_limit = branch_limit
+        cells = size * size
+
+        self.windows = []
+        for i in range(size):
+            for j in range(size):
+                for di, dj in LINE_DIRECTIONS:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < size and 0 <= end_j < size:
+                        self.windows.append(tuple((i + di * t) * size + j + dj * t for t in range(k)))
+        self.cell_windows = [[] for _ in range(cells)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Cells next to each cell; with a branch limit only cells next to
+        # a mark are searched
+        self.neighbors = [
+            [r * size + c
+             for r in range(max(0, i - 1), min(size, i + 2))
+             for c in range(max(0, j - 1), min(size, j + 2))
+             if (r, c) != (i, j)]
+            for i in range(size) for j in range(size)
+        ]
+
+        # Score of a window by its (X count, O count): only windows one
+        # player could still complete count, more marks counting for more
+        self.scores = [
+            [0 if x and o else 10 ** x if x else -(10 ** o) if o else 0 for o in range(k + 1)]
+            for x in range(k + 1)
+        ]
+
+        rng = random.Random(size * 1000 + k)
+        self.zobrist = [None] + [[rng.getrandbits(64) for _ in range(cells)] for _ in range(2)]
+        self.table = {}
+        self.stats = {}
+
+    def best_move(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the action (i, j) for the player to move on a list-of-lists
+        board, searching one ply deeper at a time until `time_limit`
+        seconds have passed or `max_depth` plies are searched. The move
+        from the deepest completed search is returned.
+        """
+        self._load(board)
+        moves = self._candidates()
+        if not moves:
+            return None
+        start = time.perf_counter()
+        self.deadline = None if time_limit is None else start + time_limit
+        self.nodes = 0
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+
+        color = 1 if self.mark == 1 else -1
+        empties = self.cells.count(0)
+        best, value, depth = moves[0], 0, 0
+        for depth in range(1, (max_depth or empties) + 1):
+            try:
+                best, value = self._root(depth, color, best)
+            except Timeout:
+                depth -= 1
+                break
+            # Stop once the result is a forced win or loss, or the board
+            # would fill up within this depth
+            if abs(value) >= WIN - self.size * self.size or depth >= empties:
+                break
+
+        self.stats = {
+            "depth": depth,
+            "nodes": self.nodes,
+            "value": value,
+            "seconds": time.perf_counter() - start,
+        }
+        return divmod(best, self.size)
+
+    def _load(self, board):
+        """
+        Sets up the search state for a list-of-lists board.
+        """
+        cells = self.size * self.size
+        self.cells = [0] * cells
+        self.x_counts = [0] * len(self.windows)
+        self.o_counts = [0] * len(self.windows)
+        self.near = [0] * cells
+        self.score = 0
+        self.hash = 0
+        x_marks = o_marks = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                mark = MARKS[cell]
+                if mark:
+                    self._make(i * self.size + j, mark)
+                    x_marks += mark == 1
+                    o_marks += mark == 2
+        self.mark = 1 if x_marks == o_marks else 2
+
+    def _make(self, index, mark):
+        """
+        Places a mark and returns True if it completes a line.
+        """
+        self.cells[index] = mark
+        self.hash ^= self.zobrist[mark][index]
+        counts = self.x_counts if mark == 1 else self.o_counts
+        scores = self.scores
+        x_counts, o_counts = self.x_counts, self.o_counts
+        won = False
+        for w in self.cell_windows[index]:
+            self.score -= scores[x_counts[w]][o_counts[w]]
+            counts[w] += 1
+            self.score += scores[x_counts[w]][o_counts[w]]
+            if counts[w] == self.k:
+                won = True
+        for cell in self.neighbors[index]:
+            self.near[cell] += 1
+        return won
+
+    def _unmake(self, index, mark):
+        self.cells[index] = 0
+        self.hash ^= self.zobrist[mark][index]
+        counts = self.x_counts if mark == 1 else self.o_counts
+        scores = self.scores
+        x_counts, o_counts = self.x_counts, self.o_counts
+        for w in self.cell_windows[index]:
+            self.score -= scores[x_counts[w]][o_counts[w]]
+            counts[w] -= 1
+            self.score += scores[x_counts[w]][o_counts[w]]
+        for cell in self.neighbors[index]:
+            self.near[cell] -= 1
+
+    def _candidates(self, first=None):
+        """
+        Returns the empty cells to search, most threatening first, with
+        `first` moved to the front. With a branch limit only cells next
+        to a mark (or the centre of an empty board) are considered.
+        """
+        cells, near = self.cells, self.near
+        if self.branch_limit is None:
+            moves = [index for index in range(len(cells)) if not cells[index]]
+        else:
+            moves = [index for index in range(len(cells)) if not cells[index] and near[index]]
+        if not moves:
+            if 0 not in cells:
+                return []
+            if any(cells):
+                moves = [index for index in range(len(cells)) if not cells[index]]
+            else:
+                centre = self.size // 2
+                return [centre * self.size + centre]
+
+        # Windows a move extends for either player, longer ones first
+        x_counts, o_counts = self.x_counts, self.o_counts
+
+        def threat(index):
+            total = 0
+            for w in self.cell_windows[index]:
+                x, o = x_counts[w], o_counts[w]
+                if not o:
+                    total += 10 ** x
+                if not x:
+                    total += 10 ** o
+            return total
+
+        moves.sort(key=threat, reverse=True)
+        if self.branch_limit is not None:
+            moves = moves[:self.branch_limit]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        elif first is not None and not cells[first]:
+            moves.insert(0, first)
+        return moves
+
+    def _root(self, depth, color, previous):
+        """
+        Searches every root move to `depth` plies and returns the best
+        move and its value for the player to move.
+        """
+        alpha, beta = -WIN - 1, WIN + 1
+        best, best_value = None, -WIN - 1
+        mark = self.mark
+        for index in self._candidates(previous):
+            value = self._child(index, mark, depth, -beta, -alpha, 0, color)
+            if value > best_value:
+                best, best_value = index, value
+            alpha = max(alpha, value)
+        self.table[self.hash] = (depth, best_value, 0, best)
+        return best, best_value
+
+    def _child(self, index, mark, depth, alpha, beta, ply, color):
+        """
+        Returns the value of playing `index` for the mover, given the
+        negated window of the search below it.
+        """
+        if self._make(index, mark):
+            value = WIN - ply - 1
+        elif 0 not in self.cells:
+            value = 0
+        else:
+            value = -self._negamax(depth - 1, alpha, beta, ply + 1, -color)
+        self._unmake(index, mark)
+        return value
+
+    def _negamax(self, depth, alpha, beta, ply, color):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+
+        # Bounds: 0 exact, 1 lower, 2 upper
+        original_alpha = alpha
+        entry = self.table.get(self.hash)
+        first = None
+        if entry is not None:
+            entry_depth, value, bound, first = entry
+            value = _from_table(value, ply)
+            if entry_depth >= depth:
+                if bound == 0:
+                    return value
+                if bound == 1:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        if depth == 0:
+            return color * self.score
+
+        mark = 1 if color == 1 else 2
+        best, best_value = None, -WIN - 1
+        for index in self._candidates(first):
+            value = self._child(index, mark, depth, -beta, -alpha, ply, color)
+            if value > best_value:
+                best, best_value = index, value
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = 2
+        elif best_value >= beta:
+            bound = 1
+        else:
+            bound = 0
+        self.table[self.hash] = (depth, _to_table(best_value, ply), bound, best)
+        return best_value
+
+
+# Win scores count plies from the search root; the table stores them
+# counted from the position itself so they stay valid at any ply
+def _to_table(value, ply):
+    if value >= WIN - MATE_WINDOW:
+        return value + ply
+    if value <= -WIN + MATE_WINDOW:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    if value >= WIN - MATE_WINDOW:
+        return value - ply
+    if value <= -WIN + MATE_WINDOW:
+        return value + ply
+    return value
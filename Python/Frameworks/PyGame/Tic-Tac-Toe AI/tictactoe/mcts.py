@@ -0,0 +1,239 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Cell codes of the compact board: a bytearray of size * size cells
+MARKS = {EMPTY: 0, X: 1, O: 2}
+
+# Directions a line can run in, as (row step, column step)
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# UCT exploration constant
+EXPLORATION = math.sqrt(2)
+
+
+class Rules():
+    """
+    k-in-a-row rules on a compact size × size board.
+    """
+
+    def __init__(self, size, k):
+        self.size = size
+        self.k = k
+        # For each cell and direction, the cells running each way from it
+        self.rays = [
+            [(self._ray(index, di, dj), self._ray(index, -di, -dj)) for di, dj in LINE_DIRECTIONS]
+            for index in range(size * size)
+        ]
+        # Cells next to each cell, where the tree looks for moves on big boards
+        self.neighbors = [
+            [r * size + c
+             for r in range(max(0, i - 1), min(size, i + 2))
+             for c in range(max(0, j - 1), min(size, j + 2))
+             if (r, c) != (i, j)]
+            for i in range(size) for j in range(size)
+        ]
+
+    def _ray(self, index, di, dj):
+        i, j = divmod(index, self.size)
+        cells = []
+        for t in range(1, self.k):
+            r, c = i + di * t, j + dj * t
+            if not (0 <= r < self.size and 0 <= c < self.size):
+                break
+            cells.append(r * self.size + c)
+        return cells
+
+    def wins(self, cells, index):
+        """
+        Returns True if the mark just placed at `index` completes a line.
+        """
+        mark = cells[index]
+        for forward, backward in self.rays[index]:
+            count = 1
+            for cell in forward:
+                if cells[cell] != mark:
+                    break
+                count += 1
+            for cell in backward:
+                if cells[cell] != mark:
+                    break
+                count += 1
+            if count >= self.k:
+                return True
+        return False
+
+    def moves(self, cells):
+        """
+        Returns the empty cells worth trying: all of them on boards up to
+        4×4, otherwise those next to a mark (or the centre of an empty board).
+        """
+        empty = [index for index, cell in enumerate(cells) if not cell]
+        if self.size <= 4:
+            return empty
+        if len(empty) == len(cells):
+            centre = self.size // 2
+            return [centre * self.size + centre]
+        near = [index for index in empty if any(cells[cell] for cell in self.neighbors[index])]
+        return near or empty
+
+    def playout(self, cells, mark, rng):
+        """
+        Plays random moves from a position with `mark` to move and
+        returns the winning mark, or 0 for a draw.
+        """
+        cells = bytearray(cells)
+        empty = [index for index, cell in enumerate(cells) if not cell]
+        rng.shuffle(empty)
+        for index in empty:
+            cells[index] = mark
+            if self.wins(cells, index):
+                return mark
+            mark = 3 - mark
+        return 0
+
+
+class Node():
+    def __init__(self, move, parent, mark, moves):
+        self.move = move
+        self.parent = parent
+        # Mark of the player who made `move`
+        self.mark = mark
+        self.children = []
+        self.untried = moves
+        self.visits = 0
+        # Wins for `mark`, counting draws as half
+        self.wins = 0.0
+        self.winner = None
+
+    def select(self):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits)
+        )
+
+
+def search(size, k, cells, mark, playouts=None, deadline=None, seed=None):
+    """
+    Runs UCT from a compact position until `playouts` playouts are done
+    or the `deadline` (a time.time() value) passes. Returns the root
+    statistics as {move: (visits, wins for `mark`)} and the playout count.
+    """
+    rules = Rules(size, k)
+    rng = random.Random(seed)
+    cells = bytearray(cells)
+    root = Node(None, None, 3 - mark, rules.moves(cells))
+    count = 0
+
+    while (playouts is None or count < playouts) and (deadline is None or time.time() < deadline):
+        node = root
+        board = bytearray(cells)
+
+        # Select down fully expanded nodes, then expand one new child
+        while not node.untried and node.children and node.winner is None:
+            node = node.select()
+            board[node.move] = node.mark
+        if node.untried and node.winner is None:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            board[move] = 3 - node.mark
+            child = Node(move, node, 3 - node.mark, [])
+            if rules.wins(board, move):
+                child.winner = child.mark
+            elif 0 not in board:
+                child.winner = 0
+            else:
+                child.untried = rules.moves(board)
+            node.children.append(child)
+            node = child
+
+        # Play out and back up the result
+        if node.winner is not None:
+            winner = node.winner
+        else:
+            winner = rules.playout(board, 3 - node.mark, rng)
+        while node is not None:
+            node.visits += 1
+            if winner == node.mark:
+                node.wins += 1
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+        count += 1
+
+    return {child.move: (child.visits, child.wins) for child in root.children}, count
+
+
+class MCTSPlayer():
+    """
+    Monte Carlo Tree Search player with a budget of playouts or
+    milliseconds per move, optionally split across worker processes
+    that each grow their own tree from the root.
+    """
+
+    def __init__(self, size, k, playouts=None, milliseconds=None, workers=1, seed=None):
+        if playouts is None and milliseconds is None:
+            raise Exception("MCTS needs a playout or time budget")
+        self.size = size
+        self.k = k
+        self.playouts = playouts
+        self.milliseconds = milliseconds
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.pool = None
+        self.stats = {}
+
+    def best_move(self, board):
+        """
+        Returns the most visited root action (i, j) for the player to
+        move on a list-of-lists board.
+        """
+        cells = bytearray(MARKS[cell] for row in board for cell in row)
+        x_marks, o_marks = cells.count(1), cells.count(2)
+        mark = 1 if x_marks == o_marks else 2
+        start = time.time()
+        deadline = None if self.milliseconds is None else start + self.milliseconds / 1000
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+
+        if self.workers > 1:
+            # Each worker searches its own tree with a share of the playouts
+            share = None if self.playouts is None else -(-self.playouts // self.workers)
+            pool = self._pool()
+            futures = [
+                pool.submit(search, self.size, self.k, bytes(cells), mark, share, deadline, seed)
+                for seed in seeds
+            ]
+            results = [future.result() for future in futures]
+        else:
+            results = [search(self.size, self.k, cells, mark, self.playouts, deadline, seeds[0])]
+
+        # Root parallelization: add up the root children of every tree
+        visits = {}
+        for children, _ in results:
+            for move, (count, _) in children.items():
+                visits[move] = visits.get(move, 0) + count
+        if not visits:
+            return None
+        move = max(visits, key=visits.get)
+        self.stats = {
+            "playouts": sum(count for _, count in results),
+            "visits": visits[move],
+            "seconds": time.time() - start,
+        }
+        return divmod(move, self.size)
+
+    def _pool(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
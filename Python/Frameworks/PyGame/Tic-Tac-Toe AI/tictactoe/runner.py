@@ -3,144 +3,277 @@ import sys
 import time
 
 import tictactoe as ttt
+from worker import AIWorker
 
-pygame.init()
 size = width, height = 600, 400
 
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
 
-screen = pygame.display.set_mode(size)
-
-mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
-largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
-
-user = None
-board = ttt.initial_state()
-ai_turn = False
-
-while True:
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-    screen.fill(black)
-
-    # Let user choose a player.
-    if user is None:
-
-        # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Draw buttons
-        playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
-        playXRect = playX.get_rect()
-        playXRect.center = playXButton.center
-        pygame.draw.rect(screen, white, playXButton)
-        screen.blit(playX, playXRect)
-
-        playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
-        playORect = playO.get_rect()
-        playORect.center = playOButton.center
-        pygame.draw.rect(screen, white, playOButton)
-        screen.blit(playO, playORect)
-
-        # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = ttt.X
-            elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = ttt.O
+# Frames drawn per second while the AI thinks in the background, and
+# while waiting for the user, when nothing on screen is moving
+FPS = 30
+IDLE_FPS = 15
+
+# Fonts for the marks, by tile size
+moveFonts = {}
+
+# Rendered text and buttons, so each is rendered once rather than every frame
+texts = {}
+buttons = {}
+TEXT_CACHE_SIZE = 256
+
+# The board surface, rebuilt only when the board or tile size changes
+boardKey = None
+boardSurface = None
+
+# What is on screen, as (surface, rect) pairs, so a frame only updates
+# the areas that changed; None redraws the whole window
+shown = None
 
-    else:
 
-        # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
-        tiles = []
-        for i in range(3):
-            row = []
-            for j in range(3):
-                rect = pygame.Rect(
-                    tile_origin[0] + j * tile_size,
-                    tile_origin[1] + i * tile_size,
-                    tile_size, tile_size
-                )
-                pygame.draw.rect(screen, white, rect, 3)
+def render(font, text, color):
+    """
+    Returns the rendered surface for a text, rendering it only once.
+    """
+    key = (font, text, color)
+    if key not in texts:
+        # Stats lines differ every move, so start over now and then
+        if len(texts) >= TEXT_CACHE_SIZE:
+            texts.clear()
+        texts[key] = font.render(text, True, color)
+    return texts[key]
 
+
+def render_button(font, text, size, filled):
+    """
+    Returns a button surface with a centred label, filled or outlined.
+    """
+    key = (font, text, size, filled)
+    if key not in buttons:
+        surface = pygame.Surface(size)
+        surface.fill(black)
+        pygame.draw.rect(surface, white, surface.get_rect(), 0 if filled else 2)
+        label = render(font, text, black if filled else white)
+        surface.blit(label, label.get_rect(center=surface.get_rect().center))
+        buttons[key] = surface
+    return buttons[key]
+
+
+def render_board(board, tile_size):
+    """
+    Returns a surface with the tiles and marks of a board, rebuilding
+    it only when the board or tile size has changed.
+    """
+    global boardKey, boardSurface
+    key = (tuple(tuple(row) for row in board), tile_size)
+    if key != boardKey:
+        n = len(board)
+        if tile_size not in moveFonts:
+            moveFonts[tile_size] = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+        surface = pygame.Surface((n * tile_size, n * tile_size))
+        surface.fill(black)
+        for i in range(n):
+            for j in range(n):
+                rect = pygame.Rect(j * tile_size, i * tile_size, tile_size, tile_size)
+                pygame.draw.rect(surface, white, rect, 3 if n <= 4 else 1)
                 if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
-                    moveRect = move.get_rect()
-                    moveRect.center = rect.center
-                    screen.blit(move, moveRect)
-                row.append(rect)
-            tiles.append(row)
-
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
-
-        # Show title
-        if game_over:
-            winner = ttt.winner(board)
-            if winner is None:
-                title = f"Game Over: Tie."
-            else:
-                title = f"Game Over: {winner} wins."
-        elif user == player:
-            title = f"Play as {user}"
-        else:
-            title = f"Computer thinking..."
-        title = largeFont.render(title, True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 30)
-        screen.blit(title, titleRect)
-
-        # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+                    move = render(moveFonts[tile_size], board[i][j], white)
+                    surface.blit(move, move.get_rect(center=rect.center))
+        boardKey, boardSurface = key, surface
+    return boardSurface
+
+
+def present(scene):
+    """
+    Draws a frame given as (surface, rect) pairs, updating only the
+    parts of the window where something was added, moved or removed.
+    """
+    global shown
+    screen = pygame.display.get_surface()
+    scene = [(surface, tuple(rect)) for surface, rect in scene]
+    if shown is None:
+        screen.fill(black)
+        for surface, rect in scene:
+            screen.blit(surface, rect)
+        pygame.display.flip()
+    else:
+        changed = set(shown) ^ set(scene)
+        if not changed:
+            return
+        dirty = [pygame.Rect(rect) for _, rect in changed]
+        for rect in dirty:
+            screen.fill(black, rect)
+        for surface, rect in scene:
+            if pygame.Rect(rect).collidelist(dirty) != -1:
+                screen.blit(surface, rect)
+        pygame.display.update(dirty)
+    shown = scene
+
+
+def main():
+    global shown
+
+    pygame.init()
+    pygame.display.set_mode(size)
+
+    mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
+    largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
+    smallFont = pygame.font.Font("OpenSans-Regular.ttf", 20)
+    statsFont = pygame.font.Font("OpenSans-Regular.ttf", 16)
+
+    clock = pygame.time.Clock()
+    worker = AIWorker()
+
+    user = None
+    board_size = 3
+    difficulty = "Perfect"
+    board = ttt.initial_state()
+    stats = None
+
+    try:
+        while True:
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    sys.exit()
+                # Redraw everything once the window has been uncovered
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    shown = None
+
+            scene = []
+
+            # Let user choose a player.
+            if user is None:
+
+                # Draw title
+                title = render(largeFont, "Play Tic-Tac-Toe", white)
+                scene.append((title, title.get_rect(center=((width / 2), 50))))
+
+                # Draw board size buttons, highlighting the chosen size
+                sizeButtons = []
+                button_width = width / (len(ttt.BOARD_SIZES) + 1)
+                for n, option in enumerate(ttt.BOARD_SIZES):
+                    button = pygame.Rect(
+                        button_width / 2 + n * button_width + 5, height / 4 + 10,
+                        button_width - 10, 40
+                    )
+                    scene.append((render_button(smallFont, f"{option}×{option}", button.size, option == board_size), button))
+                    sizeButtons.append((button, option))
+                rule = render(smallFont, f"{ttt.win_length(board_size)} in a row wins", white)
+                scene.append((rule, rule.get_rect(center=((width / 2), height / 4 + 70))))
+
+                # Draw difficulty buttons, highlighting the chosen level
+                difficultyButtons = []
+                button_width = width / (len(ttt.DIFFICULTIES) + 1)
+                for n, option in enumerate(ttt.DIFFICULTIES):
+                    button = pygame.Rect(
+                        button_width / 2 + n * button_width + 5, height / 2 + 10,
+                        button_width - 10, 40
+                    )
+                    scene.append((render_button(smallFont, option, button.size, option == difficulty), button))
+                    difficultyButtons.append((button, option))
+
+                # Draw buttons
+                playXButton = pygame.Rect((width / 8), (3 * height / 4), width / 4, 50)
+                scene.append((render_button(mediumFont, "Play as X", playXButton.size, True), playXButton))
+
+                playOButton = pygame.Rect(5 * (width / 8), (3 * height / 4), width / 4, 50)
+                scene.append((render_button(mediumFont, "Play as O", playOButton.size, True), playOButton))
+
+                # Check if button is clicked
+                click, _, _ = pygame.mouse.get_pressed()
+                if click == 1:
+                    mouse = pygame.mouse.get_pos()
+                    for button, option in sizeButtons:
+                        if button.collidepoint(mouse):
+                            board_size = option
+                    for button, option in difficultyButtons:
+                        if button.collidepoint(mouse):
+                            difficulty = option
+                    if playXButton.collidepoint(mouse):
+                        time.sleep(0.2)
+                        user = ttt.X
+                        board = ttt.initial_state(board_size)
+                    elif playOButton.collidepoint(mouse):
+                        time.sleep(0.2)
+                        user = ttt.O
+                        board = ttt.initial_state(board_size)
+
             else:
-                ai_turn = True
-
-        # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
-                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
-
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
-
-    pygame.display.flip()
+
+                # Draw game board, shrinking tiles to fit larger boards
+                n = len(board)
+                tile_size = min(80, (height - 140) // n)
+                tile_origin = (width / 2 - (n / 2 * tile_size),
+                               height / 2 - (n / 2 * tile_size))
+                boardRect = pygame.Rect(tile_origin, (n * tile_size, n * tile_size))
+                scene.append((render_board(board, tile_size), boardRect))
+
+                game_over = ttt.terminal(board)
+                player = ttt.player(board)
+
+                # Show title
+                if game_over:
+                    winner = ttt.winner(board)
+                    if winner is None:
+                        title = f"Game Over: Tie."
+                    else:
+                        title = f"Game Over: {winner} wins."
+                elif user == player:
+                    title = f"Play as {user}"
+                else:
+                    title = "Computer thinking" + "." * (int(worker.elapsed * 3) % 4)
+                title = render(largeFont, title, white)
+                scene.append((title, title.get_rect(center=((width / 2), 30))))
+
+                # Start the AI move in the background, or take it once it's ready
+                if user != player and not game_over:
+                    if not worker.running:
+                        worker.start(ttt.ai_move, board, difficulty)
+                    else:
+                        move = worker.result()
+                        if move is not None:
+                            board = ttt.result(board, move)
+                            stats = dict(ttt.last_stats, ms=round(worker.seconds * 1000))
+
+                # Show how the last AI move was found
+                if stats and not game_over:
+                    text = render(
+                        statsFont, "Last AI move: " + ", ".join(f"{value} {key}" for key, value in stats.items()), white
+                    )
+                    scene.append((text, text.get_rect(center=((width / 2), height - 20))))
+
+                # Check for a user move
+                click, _, _ = pygame.mouse.get_pressed()
+                if click == 1 and user == player and not game_over:
+                    mouse = pygame.mouse.get_pos()
+                    if boardRect.collidepoint(mouse):
+                        i = int(mouse[1] - boardRect.top) // tile_size
+                        j = int(mouse[0] - boardRect.left) // tile_size
+                        if board[i][j] == ttt.EMPTY:
+                            board = ttt.result(board, (i, j))
+
+                if game_over:
+                    againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+                    scene.append((render_button(mediumFont, "Play Again", againButton.size, True), againButton))
+                    click, _, _ = pygame.mouse.get_pressed()
+                    if click == 1:
+                        mouse = pygame.mouse.get_pos()
+                        if againButton.collidepoint(mouse):
+                            time.sleep(0.2)
+                            user = None
+                            board = ttt.initial_state()
+                            stats = None
+                            worker.cancel()
+
+            present(scene)
+            clock.tick(FPS if worker.running else IDLE_FPS)
+    finally:
+        worker.shutdown()
+        ttt.close_players()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import sys
+from array import array
+
+import bitboard
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solutions.bin")
+MAGIC = b"TTT1"
+
+# The 8 symmetries of the board as maps from (i, j) to the cell it moves to
+SYMMETRIES = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+)
+
+# PERMUTATIONS[s][index] is the bit index that `index` moves to under
+# symmetry s, and TRANSFORMS[s][mask] is a whole 9-bit mask moved by it
+PERMUTATIONS = tuple(
+    tuple(i * 3 + j for i, j in (symmetry(*bitboard.cell(index)) for index in range(9)))
+    for symmetry in SYMMETRIES
+)
+TRANSFORMS = tuple(
+    tuple(sum(1 << permutation[index] for index in range(9) if mask >> index & 1) for mask in range(512))
+    for permutation in PERMUTATIONS
+)
+
+
+def canonical(bits):
+    """
+    Returns (key, symmetry) for a bitboard, where key encodes the
+    smallest of its 8 symmetric images as x | o << 9.
+    """
+    x, o = bits
+    return min(
+        (TRANSFORMS[s][x] | TRANSFORMS[s][o] << 9, s) for s in range(len(SYMMETRIES))
+    )
+
+
+def decode(key):
+    """
+    Returns the bitboard encoded by a canonical key.
+    """
+    return (key & bitboard.FULL, key >> 9)
+
+
+def solve(bits, values):
+    """
+    Returns the minimax value of a bitboard by full search,
+    memoizing every position's value in `values`.
+    """
+    if bits in values:
+        return values[bits]
+    if bitboard.terminal(bits):
+        value = bitboard.utility(bits)
+    else:
+        children = [solve(bitboard.result(bits, index), values) for index in bitboard.actions(bits)]
+        value = max(children) if bitboard.player(bits) == bitboard.X else min(children)
+    values[bits] = value
+    return value
+
+
+def build():
+    """
+    Solves every reachable canonical position that is not over.
+    Returns a dict from canonical key to (best move index, value),
+    with the move given in the canonical orientation.
+    """
+    values = {}
+    table = {}
+    stack = [bitboard.initial_state()]
+    while stack:
+        bits = stack.pop()
+        key, _ = canonical(bits)
+        if key in table or bitboard.terminal(bits):
+            continue
+        position = decode(key)
+        value = solve(position, values)
+        for index in bitboard.actions(position):
+            if solve(bitboard.result(position, index), values) == value:
+                table[key] = (index, value)
+                break
+        for index in bitboard.actions(bits):
+            stack.append(bitboard.result(bits, index))
+    return table
+
+
+def save(table, filename=TABLE_FILE):
+    """
+    Writes a table as a header, the sorted keys as 32-bit integers, and
+    one byte per key holding the move in the low 4 bits and value + 1
+    in the next 2.
+    """
+    keys = array("I", sorted(table))
+    entries = bytes(table[key][0] | (table[key][1] + 1) << 4 for key in keys)
+    with open(filename, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(keys).to_bytes(4, "little"))
+        if sys.byteorder != "little":
+            keys.byteswap()
+        keys.tofile(f)
+        f.write(entries)
+
+
+def load(filename=TABLE_FILE):
+    """
+    Reads a table written by save, or returns None if there is no
+    table file.
+    """
+    try:
+        with open(filename, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if data[:4] != MAGIC:
+        raise Exception(f"{filename} is not a solution table")
+    count = int.from_bytes(data[4:8], "little")
+    keys = array("I")
+    keys.frombytes(data[8:8 + 4 * count])
+    if sys.byteorder != "little":
+        keys.byteswap()
+    entries = data[8 + 4 * count:8 + 5 * count]
+    return {key: (entry & 15, (entry >> 4) - 1) for key, entry in zip(keys, entries)}
+
+
+def lookup(table, bits):
+    """
+    Returns (best move index, value) for a bitboard that is not over,
+    mapping the stored move back to the board's own orientation.
+    Raises KeyError for positions that cannot arise in play.
+    """
+    key, s = canonical(bits)
+    index, value = table[key]
+    return PERMUTATIONS[s].index(index), value
+
+
+def verify(table):
+    """
+    Checks the table against a full search of every reachable position.
+    Returns the number of positions where the stored value is wrong or
+    the stored move is not optimal.
+    """
+    values = {}
+    errors = 0
+    seen = set()
+    stack = [bitboard.initial_state()]
+    while stack:
+        bits = stack.pop()
+        if bits in seen or bitboard.terminal(bits):
+            continue
+        seen.add(bits)
+        index, value = lookup(table, bits)
+        if value != solve(bits, values) or solve(bitboard.result(bits, index), values) != value:
+            errors += 1
+        for index in bitboard.actions(bits):
+            stack.append(bitboard.result(bits, index))
+    print(f"Checked {len(seen)} positions against full search: {errors} errors.")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or verify the tic-tac-toe solution table.")
+    parser.add_argument("command", choices=("build", "verify"))
+    parser.add_argument("--file", default=TABLE_FILE)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        table = build()
+        save(table, args.file)
+        print(f"Wrote {len(table)} canonical positions to {args.file} ({os.path.getsize(args.file)} bytes).")
+    else:
+        table = load(args.file)
+        if table is None:
+            sys.exit(f"No table at {args.file}; run build first.")
+        sys.exit(1 if verify(table) else 0)
+
+
+if __name__ == "__main__":
+    main()
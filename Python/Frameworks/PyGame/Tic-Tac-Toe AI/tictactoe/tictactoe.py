@@ -1,37 +1,45 @@
 import math
-import sys
-import time
+import os
 
-import pygame
+import bitboard
+import engine
+import mcts
+import solutions
 
 # Constants for players and board state
 X = "X"
 O = "O"
 EMPTY = None
 
-# Initialize Pygame
-pygame.init()
-size = width, height = 600, 400
-black = (0, 0, 0)
-white = (255, 255, 255)
-screen = pygame.display.set_mode(size)
-mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
-largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
-user = None
-board = [[EMPTY, EMPTY, EMPTY],
-         [EMPTY, EMPTY, EMPTY],
-         [EMPTY, EMPTY, EMPTY]]
-ai_turn = False
+# Board sizes the runner offers, and how many in a row win on each
+BOARD_SIZES = (3, 4, 7, 15)
+WIN_LENGTHS = {3: 3, 4: 4, 7: 5, 15: 5}
 
+# Seconds the AI may think per move on boards larger than 3×3
+TIME_BUDGET = 1.0
 
-def initial_state():
+# AI difficulty levels: MCTS budgets trade strength for speed, and
+# "Perfect" plays minimax
+DIFFICULTIES = ("Easy", "Medium", "Hard", "Perfect")
+MCTS_BUDGETS = {
+    "Easy": {"playouts": 50},
+    "Medium": {"playouts": 500},
+    "Hard": {"milliseconds": 500, "workers": os.cpu_count() or 1},
+}
+
+
+def initial_state(size=3):
+    """
+    Returns starting state of a size × size board.
+    """
+    return [[EMPTY] * size for _ in range(size)]
+
+
+def win_length(size):
     """
-    Returns starting state of the board.
+    Returns how many marks in a row win on a size × size board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return WIN_LENGTHS.get(size, min(size, 5))
 
 
 def player(board):
@@ -50,7 +58,8 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    candidates = [(i, j) for i in range(3) for j in range(3) if board[i][j] == EMPTY]
+    size = len(board)
+    candidates = [(i, j) for i in range(size) for j in range(size) if board[i][j] == EMPTY]
     return candidates
 
 
@@ -70,6 +79,9 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    if len(board) != 3:
+        return _winner_k(board, win_length(len(board)))
+
     # Check rows, columns, and diagonals for a winner
     for i in range(3):
         # Check rows and columns
@@ -85,6 +97,24 @@ def winner(board):
     return None
 
 
+def _winner_k(board, k):
+    """
+    Returns the player with k marks in a row on a board of any size.
+    """
+    size = len(board)
+    for i in range(size):
+        for j in range(size):
+            mark = board[i][j]
+            if mark is EMPTY:
+                continue
+            for di, dj in engine.LINE_DIRECTIONS:
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if (0 <= end_i < size and 0 <= end_j < size
+                        and all(board[i + di * t][j + dj * t] == mark for t in range(1, k))):
+                    return mark
+    return None
+
+
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
@@ -108,152 +138,192 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+# One MCTS player per (board size, difficulty)
+mcts_players = {}
+
+
+# Search statistics of the last ai_move, such as depth, nodes or playouts
+last_stats = {}
+
+
+def ai_move(board, difficulty="Perfect"):
     """
-    Returns the optimal action for the current player on the board using the minimax algorithm.
+    Returns the AI's action for the current player at a difficulty level.
     """
+    last_stats.clear()
     if terminal(board):
         return None
+    size = len(board)
+    if difficulty == "Perfect":
+        move = minimax(board)
+        if size != 3:
+            last_stats.update(depth=engines[size].stats["depth"], nodes=engines[size].stats["nodes"])
+        else:
+            last_stats.update(minimax_stats)
+        return move
+    key = (size, difficulty)
+    if key not in mcts_players:
+        mcts_players[key] = mcts.MCTSPlayer(size, win_length(size), **MCTS_BUDGETS[difficulty])
+    move = mcts_players[key].best_move(board)
+    last_stats.update(playouts=mcts_players[key].stats["playouts"])
+    return move
+
+
+def close_players():
+    """
+    Shuts down the worker processes of every MCTS player.
+    """
+    for mcts_player in mcts_players.values():
+        mcts_player.close()
+    mcts_players.clear()
+
+
+def board_key(board):
+    """
+    Returns a hashable encoding of the board: its bitboard.
+    """
+    return bitboard.from_board(board)
+
+
+# Values already searched, by bitboard: (value, bound), where bound
+# says whether value is exact or only a lower or upper bound on it
+EXACT, LOWER, UPPER = range(3)
+transpositions = {}
+
+# How the last 3×3 minimax move was found: from the solution table, or
+# by a search visiting some number of nodes
+minimax_stats = {}
+
+# Precomputed best moves for canonical positions, if solutions.bin was built
+solution_table = solutions.load()
+
 
-    if player(board) == X:
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board using the minimax algorithm.
+
+    Boards larger than 3×3 are searched by the k-in-a-row engine within
+    TIME_BUDGET seconds instead.
+    """
+    if len(board) != 3:
+        if terminal(board):
+            return None
+        return _engine(len(board)).best_move(board, TIME_BUDGET)
+
+    minimax_stats.clear()
+    bits = bitboard.from_board(board)
+    if bitboard.terminal(bits):
+        return None
+    if solution_table is not None:
+        try:
+            index, _ = solutions.lookup(solution_table, bits)
+            minimax_stats.update(source="table")
+            return bitboard.cell(index)
+        except KeyError:
+            pass
+    minimax_stats.update(source="search", nodes=0)
+
+    # Alpha-beta keeps the first action with the best value, as the
+    # plain search did: later actions only need proving no better
+    if bitboard.player(bits) == X:
         value = -math.inf
-        for action in actions(board):
-            min_val = min_value(result(board, action))
+        for index in bitboard.actions(bits):
+            min_val = _search(bitboard.result(bits, index), value, math.inf, False)
             if min_val > value:
                 value = min_val
-                best_action = action
+                best_action = bitboard.cell(index)
+                if value == 1:
+                    break
     else:
         value = math.inf
-        for action in actions(board):
-            max_val = max_value(result(board, action))
+        for index in bitboard.actions(bits):
+            max_val = _search(bitboard.result(bits, index), -math.inf, value, True)
             if max_val < value:
                 value = max_val
-                best_action = action
+                best_action = bitboard.cell(index)
+                if value == -1:
+                    break
     return best_action
 
 
-def max_value(board):
-    if terminal(board):
-        return utility(board)
-    value = -math.inf
-    for action in actions(board):
-        value = max(value, min_value(result(board, action)))
-    return value
+# One engine per board size, so its transposition table lasts the game
+engines = {}
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board)
-    value = math.inf
-    for action in actions(board):
-        value = min(value, max_value(result(board, action)))
-    return value
+def _engine(size):
+    if size not in engines:
+        # Up to 4×4 every move is searched; larger boards only search the
+        # most threatening moves so deeper plies fit in the time budget
+        branch_limit = None if size <= 4 else 12
+        engines[size] = engine.Engine(size, win_length(size), branch_limit)
+    return engines[size]
 
 
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-    screen.fill(black)
-
-    if user is None:
-        # User chooses a player
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = (width / 2, 50)
-        screen.blit(title, titleRect)
-
-        playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
-        playXRect = playX.get_rect()
-        playXRect.center = playXButton.center
-        pygame.draw.rect(screen, white, playXButton)
-        screen.blit(playX, playXRect)
-
-        playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
-        playORect = playO.get_rect()
-        playORect.center = playOButton.center
-        pygame.draw.rect(screen, white, playOButton)
-        screen.blit(playO, playORect)
-
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = X
-            elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
-                user = O
-    else:
-        # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size), height / 2 - (1.5 * tile_size))
-        tiles = []
-        for i in range(3):
-            row = []
-            for j in range(3):
-                rect = pygame.Rect(tile_origin[0] + j * tile_size, tile_origin[1] + i * tile_size, tile_size, tile_size)
-                pygame.draw.rect(screen, white, rect, 3)
-                if board[i][j] != EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
-                    moveRect = move.get_rect()
-                    moveRect.center = rect.center
-                    screen.blit(move, moveRect)
-                row.append(rect)
-            tiles.append(row)
-
-        game_over = terminal(board)
-        player_turn = player(board)
-
-        if game_over:
-            game_result = winner(board)
-            if game_result is None:
-                title = "Game Over: Tie."
-            else:
-                title = f"Game Over: {game_result} wins."
-        elif user == player_turn:
-            title = f"Play as {user}"
+def max_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimax value of the board. The side to move is read
+    from the board, so the shared transposition table is never given a
+    bound searched for the wrong player.
+    """
+    return _value(bitboard.from_board(board), alpha, beta)
+
+
+def min_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimax value of the board, like max_value.
+    """
+    return _value(bitboard.from_board(board), alpha, beta)
+
+
+def _value(bits, alpha, beta):
+    return _search(bits, alpha, beta, bitboard.player(bits) == X)
+
+
+def _search(bits, alpha, beta, maximizing):
+    """
+    Alpha-beta search of a bitboard's value, with results shared
+    through the transposition table.
+    """
+    if "nodes" in minimax_stats:
+        minimax_stats["nodes"] += 1
+    entry = transpositions.get(bits)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
         else:
-            title = "Computer thinking..."
-        title = largeFont.render(title, True, white)
-        titleRect = title.get_rect()
-        titleRect.center = (width / 2, 30)
-        screen.blit(title, titleRect)
-
-        if user != player_turn and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = minimax(board)
-                board = result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
-
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player_turn and not game_over:
-            mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
-                    if board[i][j] == EMPTY and tiles[i][j].collidepoint(mouse):
-                        board = result(board, (i, j))
-
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = initial_state()
-                    ai_turn = False
-
-    pygame.display.flip()
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    if bitboard.terminal(bits):
+        value = bitboard.utility(bits)
+        transpositions[bits] = (value, EXACT)
+        return value
+
+    original_alpha, original_beta = alpha, beta
+    if maximizing:
+        value = -math.inf
+        for index in bitboard.actions(bits):
+            value = max(value, _search(bitboard.result(bits, index), alpha, beta, False))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = math.inf
+        for index in bitboard.actions(bits):
+            value = min(value, _search(bitboard.result(bits, index), alpha, beta, True))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    if value <= original_alpha:
+        transpositions[bits] = (value, UPPER)
+    elif value >= original_beta:
+        transpositions[bits] = (value, LOWER)
+    else:
+        transpositions[bits] = (value, EXACT)
+    return value
+
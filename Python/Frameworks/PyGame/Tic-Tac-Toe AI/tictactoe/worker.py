@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AIWorker():
+    """
+    Computes AI moves on a background thread so the pygame loop can keep
+    drawing and handling events, polling for the move once per frame.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.started = None
+        # Seconds the last finished move took
+        self.seconds = None
+
+    @property
+    def running(self):
+        """True while a move is being computed."""
+        return self.future is not None
+
+    @property
+    def elapsed(self):
+        """Seconds since the current move was started."""
+        return 0 if self.started is None else time.perf_counter() - self.started
+
+    def start(self, function, *args):
+        """
+        Starts computing `function(*args)` in the background, cancelling
+        any move still in progress.
+        """
+        self.cancel()
+        self.started = time.perf_counter()
+        self.future = self.executor.submit(function, *args)
+
+    def result(self):
+        """
+        Returns the finished move once, or None while it is still running.
+        Exceptions raised by the search are raised here.
+        """
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        self.seconds = time.perf_counter() - self.started
+        self.started = None
+        return future.result()
+
+    def cancel(self):
+        """
+        Drops the move in progress. A search that has not started is
+        cancelled outright; one already running finishes within its own
+        budget and its result is ignored.
+        """
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+            self.started = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
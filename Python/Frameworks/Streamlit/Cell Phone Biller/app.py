@@ -1,13 +1,15 @@
 # app.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date, datetime
 import locale
 import json
 import functools
-from typing import Dict, List, Optional
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, NamedTuple, Optional
 from pathlib import Path
 import logging
 
@@ -32,7 +34,9 @@ st.set_page_config(
 # Constants
 EXPECTED_TOTAL_BILL = 354.37
 CONFIG_FILE = "tmobile_config.json"
-ALLOWED_TOTAL_DEVIATION = 0.01  # Allow 1 cent deviation due to floating point math
+
+# Bill components, in the order they are reported
+BILL_COMPONENTS = ["base_plan", "discounts", "plan_features", "equipment", "protection", "one_time_charges"]
 
 
 class ConfigurationError(Exception):
@@ -45,6 +49,129 @@ class ValidationError(Exception):
     pass
 
 
+def to_cents(amount: float) -> int:
+    """Convert a dollar amount to whole cents, rounding half-cents away from zero"""
+    return int(Decimal(str(amount)).scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def allocate_cents(total_cents: int, count: int) -> np.ndarray:
+    """Split whole cents as evenly as possible; the leftover cents go one each to the first shares"""
+    if count <= 0:
+        raise ValueError("Cannot split an amount between no members")
+    share, remainder = divmod(total_cents, count)
+    shares = np.full(count, share, dtype=np.int64)
+    shares[:remainder] += 1
+    return shares
+
+
+class BillingRule(NamedTuple):
+    """A charge or discount from the configuration, in whole cents"""
+    name: str
+    component: str
+    cents: int
+    members: List[str]
+    split: bool = False  # Split the amount across members instead of charging each of them in full
+
+
+class BillingEngine:
+    """Computes every member's bill at once, in whole cents, from rules compiled out of the configuration"""
+
+    def __init__(self, family_members: List[str], rules: List[BillingRule]):
+        self.family_members = list(family_members)
+        self.rules = list(rules)
+        positions = {member: i for i, member in enumerate(self.family_members)}
+
+        # One row per rule holding what each member owes for it, with split remainders already allocated
+        self.allocations = np.zeros((len(self.rules), len(self.family_members)), dtype=np.int64)
+        for row, rule in enumerate(self.rules):
+            unknown = [member for member in rule.members if member not in positions]
+            if unknown:
+                raise ConfigurationError(f"{rule.name} refers to unknown members: {', '.join(unknown)}")
+            columns = [positions[member] for member in rule.members]
+            if rule.split:
+                np.add.at(self.allocations[row], columns, allocate_cents(rule.cents, len(columns)))
+            else:
+                np.add.at(self.allocations[row], columns, rule.cents)
+        self.components = np.array([rule.component for rule in self.rules])
+        self._bills = None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "BillingEngine":
+        """Compile a bill configuration into allocation rules"""
+        members = config["family_members"]
+        rules = []
+
+        grouped = set()
+        for group_name, group in config["plan_groups"].items():
+            rules.append(BillingRule(group_name, "base_plan", to_cents(group["total_cost"]), group["members"], split=True))
+            grouped.update(group["members"])
+        ungrouped = [member for member in members if member not in grouped]
+        if ungrouped:
+            raise ConfigurationError(f"Family members not in any plan group: {', '.join(ungrouped)}")
+
+        # Discounts without assigned members apply to everyone, like AutoPay
+        assignments = config.get("discount_assignments", {})
+        for name, amount in config["discounts_config"].items():
+            rules.append(BillingRule(name, "discounts", to_cents(amount), assignments.get(name, members)))
+
+        equipment = config["equipment_config"]
+        for key, amount in equipment.items():
+            if key.endswith("_installment"):
+                assigned = equipment[key[:-len("_installment")] + "_assigned_to"]
+                rules.append(BillingRule(key, "equipment", to_cents(amount), _as_members(assigned)))
+
+        protection = config["protection_plans"]
+        for name, amount in protection.items():
+            if name != "protected_members":
+                rules.append(BillingRule(name, "protection", to_cents(amount), protection["protected_members"]))
+
+        for name, feature in config["plan_features"].items():
+            rules.append(BillingRule(name, "plan_features", to_cents(feature["cost"]),
+                                     _as_members(feature["assigned_to"])))
+
+        for member, amount in config["one_time_charges"].items():
+            rules.append(BillingRule(f"one_time_charges:{member}", "one_time_charges", to_cents(amount), [member]))
+
+        return cls(members, rules)
+
+    def compute(self) -> pd.DataFrame:
+        """Return every member's bill in whole cents, one row per member"""
+        if self._bills is None:
+            cents = {component: self.allocations[self.components == component].sum(axis=0)
+                     for component in BILL_COMPONENTS}
+
+            # Discounts come off the base plan, which never goes below zero
+            base_plan = np.maximum(cents["base_plan"] - cents["discounts"], 0)
+            plans_and_services = base_plan + cents["plan_features"]
+            total = plans_and_services + cents["equipment"] + cents["protection"] + cents["one_time_charges"]
+            for member, amount in zip(self.family_members, total):
+                if amount < 0:
+                    logger.warning(f"Negative total for {member}: {amount / 100:.2f}")
+
+            self._bills = pd.DataFrame({
+                "base_plan_before_discounts": cents["base_plan"],
+                "base_plan": base_plan,
+                "discounts": cents["discounts"],
+                "plan_features": cents["plan_features"],
+                "plans_and_services": plans_and_services,
+                "equipment": cents["equipment"],
+                "protection": cents["protection"],
+                "one_time_charges": cents["one_time_charges"],
+                "total": np.maximum(total, 0)
+            }, index=self.family_members)
+        return self._bills
+
+    def rule_totals(self, component: str) -> Dict[str, int]:
+        """Return the cents each rule of a component adds up to across the family"""
+        return {rule.name: int(self.allocations[row].sum())
+                for row, rule in enumerate(self.rules) if rule.component == component}
+
+
+def _as_members(assigned) -> List[str]:
+    """Accept either one member's name or a list of names"""
+    return [assigned] if isinstance(assigned, str) else list(assigned)
+
+
 class TMobileBillCalculator:
     """Calculator for T-Mobile family bill distribution with validation and persistence"""
 
@@ -102,6 +229,10 @@ class TMobileBillCalculator:
                 "legacy_tmobile_perk": 5.00,
                 "line_on_us": 29.02
             },
+            "discount_assignments": {
+                "legacy_tmobile_perk": ["Gavin"],
+                "line_on_us": ["Hayden", "Wilder"]
+            },
             "equipment_config": {
                 "iphone_16_installment": 34.59,
                 "accessories_installment": 8.13,
@@ -136,10 +267,17 @@ class TMobileBillCalculator:
             self.protection_plans = config["protection_plans"]
             self.plan_features = config["plan_features"]
             self.one_time_charges = config["one_time_charges"]
+            # Configurations saved before discount assignments existed use the default ones,
+            # kept to the members this configuration actually has
+            if "discount_assignments" in config:
+                self.discount_assignments = config["discount_assignments"]
+            else:
+                self.discount_assignments = {
+                    name: [member for member in members if member in self.family_members]
+                    for name, members in self.get_default_config()["discount_assignments"].items()
+                }
 
-            # Calculate derived values - FIXED: Use exact values from bill
-            self.plan_groups["group_one"]["cost_per_member"] = 47.60  # $238.00 / 5
-            self.plan_groups["group_two"]["cost_per_member"] = 35.00  # $70.00 / 2
+            self.engine = BillingEngine.from_config(dict(config, discount_assignments=self.discount_assignments))
 
         except KeyError as e:
             raise ConfigurationError(f"Missing required configuration key: {e}")
@@ -153,6 +291,7 @@ class TMobileBillCalculator:
                     "phone_numbers": self.phone_numbers,
                     "plan_groups": self.plan_groups,
                     "discounts_config": self.discounts_config,
+                    "discount_assignments": self.discount_assignments,
                     "equipment_config": self.equipment_config,
                     "protection_plans": self.protection_plans,
                     "plan_features": self.plan_features,
@@ -188,9 +327,7 @@ class TMobileBillCalculator:
     @functools.lru_cache(maxsize=1)
     def calculate_all_bills(self) -> Dict[str, Dict[str, float]]:
         """Calculate T-Mobile bills for all family members with caching"""
-        all_bills = {}
-        for member in self.family_members:
-            all_bills[member] = self.calculate_member_bill(member)
+        all_bills = {member: self.calculate_member_bill(member) for member in self.family_members}
 
         self.validate_totals(all_bills)
         return all_bills
@@ -200,124 +337,78 @@ class TMobileBillCalculator:
         if family_member not in self.family_members:
             raise ValueError(f"Unknown family member: {family_member}")
 
-        try:
-            base_plan = self._calculate_base_plan_cost(family_member)
-            discounts = self.calculate_discounts(family_member)
-            equipment = self._calculate_equipment_charges(family_member)
-            protection = self._calculate_protection_plans(family_member)
-            plan_features = self._calculate_plan_features(family_member)
-            one_time_charges = self._calculate_one_time_charges(family_member)
-
-            # Calculate final charges - FIXED: Apply discounts to base plan
-            final_base_plan = max(0, base_plan - discounts)
-            plans_and_services = final_base_plan + plan_features
-            total_charges = (plans_and_services + equipment + protection + one_time_charges)
-
-            # Ensure no negative totals
-            if total_charges < 0:
-                logger.warning(f"Negative total for {family_member}: {total_charges}")
-                total_charges = 0
-
-            return {
-                "base_plan": final_base_plan,  # This is after discounts
-                "discounts": discounts,
-                "plan_features": plan_features,
-                "plans_and_services": plans_and_services,
-                "equipment": equipment,
-                "protection": protection,
-                "one_time_charges": one_time_charges,
-                "total": total_charges
-            }
+        bill = self.engine.compute().loc[family_member]
+        return {
+            "base_plan": int(bill["base_plan"]) / 100,  # This is after discounts
+            "discounts": int(bill["discounts"]) / 100,
+            "plan_features": int(bill["plan_features"]) / 100,
+            "plans_and_services": int(bill["plans_and_services"]) / 100,
+            "equipment": int(bill["equipment"]) / 100,
+            "protection": int(bill["protection"]) / 100,
+            "one_time_charges": int(bill["one_time_charges"]) / 100,
+            "total": int(bill["total"]) / 100
+        }
 
-        except Exception as e:
-            logger.error(f"Error calculating bill for {family_member}: {e}")
-            raise
+    def _member_amount(self, family_member: str, column: str) -> float:
+        """Look up one column of a member's bill from the billing engine, in dollars"""
+        if family_member not in self.family_members:
+            raise ValueError(f"Unknown family member: {family_member}")
+        return int(self.engine.compute().at[family_member, column]) / 100
 
     def _calculate_base_plan_cost(self, family_member: str) -> float:
         """Calculate base plan cost for a family member BEFORE discounts"""
-        if family_member in self.plan_groups["group_one"]["members"]:
-            return self.plan_groups["group_one"]["cost_per_member"]
-        elif family_member in self.plan_groups["group_two"]["members"]:
-            return self.plan_groups["group_two"]["cost_per_member"]
-        else:
-            raise ValueError(f"Family member {family_member} not in any plan group")
+        return self._member_amount(family_member, "base_plan_before_discounts")
 
     def calculate_discounts(self, family_member: str) -> float:
         """Calculate applicable T-Mobile discounts for a family member"""
-        total_discount = 0.0
-
-        # T-Mobile AutoPay discount for everyone
-        total_discount += self.discounts_config["auto_pay"]
-
-        # Legacy T-Mobile Perk discount - only for Gavin
-        if family_member == "Gavin":
-            total_discount += self.discounts_config["legacy_tmobile_perk"]
-
-        # T-Mobile Line On Us discount for Hayden and Wilder
-        if family_member in ["Hayden", "Wilder"]:
-            total_discount += self.discounts_config["line_on_us"]
-
-        return total_discount
+        return self._member_amount(family_member, "discounts")
 
     def _calculate_equipment_charges(self, family_member: str) -> float:
         """Calculate T-Mobile equipment charges for a family member"""
-        equipment_charge = 0.0
-
-        # iPhone 16 installment
-        if family_member == self.equipment_config["iphone_16_assigned_to"]:
-            equipment_charge += self.equipment_config["iphone_16_installment"]
-
-        # Accessories installment
-        if family_member == self.equipment_config["accessories_assigned_to"]:
-            equipment_charge += self.equipment_config["accessories_installment"]
-
-        return equipment_charge
+        return self._member_amount(family_member, "equipment")
 
     def _calculate_protection_plans(self, family_member: str) -> float:
         """Calculate T-Mobile protection plan charges for a family member"""
-        if family_member in self.protection_plans["protected_members"]:
-            return self.protection_plans["protection_360_tier5"]
-        return 0.0
+        return self._member_amount(family_member, "protection")
 
     def _calculate_plan_features(self, family_member: str) -> float:
         """Calculate T-Mobile plan features (not protection)"""
-        if family_member == self.plan_features["unlimited_plus"]["assigned_to"]:
-            return self.plan_features["unlimited_plus"]["cost"]
-        return 0.0
+        return self._member_amount(family_member, "plan_features")
 
     def _calculate_one_time_charges(self, family_member: str) -> float:
         """Calculate one-time charges for a family member"""
-        return self.one_time_charges.get(family_member, 0.0)
+        return self._member_amount(family_member, "one_time_charges")
 
     def validate_totals(self, all_bills: Dict[str, Dict[str, float]]):
         """Validate that all components sum to expected totals"""
         try:
-            # Calculate expected components from bill
-            total_base_plan = sum(bill['base_plan'] for bill in all_bills.values())
-            total_equipment = sum(bill['equipment'] for bill in all_bills.values())
-            total_protection = sum(bill['protection'] for bill in all_bills.values())
-            total_plan_features = sum(bill['plan_features'] for bill in all_bills.values())
-            total_one_time = sum(bill['one_time_charges'] for bill in all_bills.values())
+            # Sum the components in whole cents, so the totals must match exactly
+            total_base_plan = sum(to_cents(bill['base_plan']) for bill in all_bills.values())
+            total_equipment = sum(to_cents(bill['equipment']) for bill in all_bills.values())
+            total_protection = sum(to_cents(bill['protection']) for bill in all_bills.values())
+            total_plan_features = sum(to_cents(bill['plan_features']) for bill in all_bills.values())
+            total_one_time = sum(to_cents(bill['one_time_charges']) for bill in all_bills.values())
 
             calculated_total = total_base_plan + total_equipment + total_protection + total_plan_features + total_one_time
+            expected_total = to_cents(EXPECTED_TOTAL_BILL)
 
-            if abs(calculated_total - EXPECTED_TOTAL_BILL) > ALLOWED_TOTAL_DEVIATION:
+            if calculated_total != expected_total:
                 error_msg = (
                     f"Total bill validation failed:\n"
-                    f"  Calculated: ${calculated_total:.2f}\n"
-                    f"  Expected: ${EXPECTED_TOTAL_BILL:.2f}\n"
-                    f"  Difference: ${calculated_total - EXPECTED_TOTAL_BILL:.2f}\n\n"
+                    f"  Calculated: ${calculated_total / 100:.2f}\n"
+                    f"  Expected: ${expected_total / 100:.2f}\n"
+                    f"  Difference: ${(calculated_total - expected_total) / 100:.2f}\n\n"
                     f"Breakdown:\n"
-                    f"  Base Plans: ${total_base_plan:.2f}\n"
-                    f"  Equipment: ${total_equipment:.2f}\n"
-                    f"  Protection: ${total_protection:.2f}\n"
-                    f"  Plan Features: ${total_plan_features:.2f}\n"
-                    f"  One-time Charges: ${total_one_time:.2f}"
+                    f"  Base Plans: ${total_base_plan / 100:.2f}\n"
+                    f"  Equipment: ${total_equipment / 100:.2f}\n"
+                    f"  Protection: ${total_protection / 100:.2f}\n"
+                    f"  Plan Features: ${total_plan_features / 100:.2f}\n"
+                    f"  One-time Charges: ${total_one_time / 100:.2f}"
                 )
                 logger.error(error_msg)
                 raise ValidationError(error_msg)
 
-            logger.info(f"Total validation passed: ${calculated_total:.2f}")
+            logger.info(f"Total validation passed: ${calculated_total / 100:.2f}")
 
         except Exception as e:
             logger.error(f"Validation error: {e}")
@@ -815,13 +906,13 @@ def display_discount_breakdown(calculator, all_bills):
 
         # T-Mobile discount types breakdown
         st.subheader("T-Mobile Discount Types")
-        auto_pay_total = calculator.discounts_config["auto_pay"] * len(calculator.family_members)
-        tmobile_perk_total = calculator.discounts_config["legacy_tmobile_perk"]
-        line_on_us_total = calculator.discounts_config["line_on_us"] * 2  # Hayden and Wilder
+        discount_totals = calculator.engine.rule_totals("discounts")
+        discount_names = {'auto_pay': 'AutoPay', 'legacy_tmobile_perk': 'Legacy T-Mobile Perk',
+                          'line_on_us': 'Line On Us'}
 
         discount_types = {
-            'T-Mobile Discount Type': ['AutoPay', 'Legacy T-Mobile Perk', 'Line On Us'],
-            'Amount': [auto_pay_total, tmobile_perk_total, line_on_us_total]
+            'T-Mobile Discount Type': [discount_names.get(name, name) for name in discount_totals],
+            'Amount': [cents / 100 for cents in discount_totals.values()]
         }
 
         df_discount_types = pd.DataFrame(discount_types)
@@ -923,6 +1014,7 @@ def display_bill_configuration(calculator):
                         "legacy_tmobile_perk": tmobile_perk,
                         "line_on_us": line_on_us
                     },
+                    "discount_assignments": calculator.discount_assignments,
                     "equipment_config": {
                         "iphone_16_installment": iphone_installment,
                         "accessories_installment": accessories_installment,
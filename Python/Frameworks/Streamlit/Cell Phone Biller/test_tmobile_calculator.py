@@ -1,8 +1,10 @@
 # test_tmobile_calculator.py
+import os
 import pytest
 import tempfile
 import json
-from app import TMobileBillCalculator, ConfigurationError, ValidationError
+from app import (TMobileBillCalculator, BillingEngine, ConfigurationError, ValidationError,
+                 EXPECTED_TOTAL_BILL, allocate_cents, to_cents)
 
 
 class TestTMobileBillCalculator:
@@ -34,15 +36,15 @@ class TestTMobileBillCalculator:
     def test_discount_calculation(self):
         """Test discount calculations"""
         # Gavin should have AutoPay + Legacy Perk
-        gavin_discounts = self.calc._calculate_discounts("Gavin")
+        gavin_discounts = self.calc.calculate_discounts("Gavin")
         assert gavin_discounts == 10.00  # 5 + 5
 
         # Mama should have only AutoPay
-        mama_discounts = self.calc._calculate_discounts("Mama")
+        mama_discounts = self.calc.calculate_discounts("Mama")
         assert mama_discounts == 5.00
 
         # Hayden should have AutoPay + Line On Us
-        hayden_discounts = self.calc._calculate_discounts("Hayden")
+        hayden_discounts = self.calc.calculate_discounts("Hayden")
         assert hayden_discounts == 34.02  # 5 + 29.02
 
     def test_base_plan_cost(self):
@@ -59,7 +61,7 @@ class TestTMobileBillCalculator:
         """Test equipment charge calculations"""
         # Mama should have both iPhone and accessories
         mama_equipment = self.calc._calculate_equipment_charges("Mama")
-        expected = 34.59 + 8.13  # iPhone + accessories
+        expected = 42.72  # $34.59 iPhone + $8.13 accessories, added in whole cents
         assert mama_equipment == expected
 
         # Gavin should have no equipment
@@ -143,6 +145,88 @@ class TestTMobileBillCalculator:
         hayden_bill = calc.calculate_member_bill("Hayden")
         assert hayden_bill["total"] >= 0
 
+    def test_total_matches_bill_exactly(self):
+        """Test that member totals add up to the bill to the cent"""
+        all_bills = self.calc.calculate_all_bills()
+        assert sum(to_cents(bill["total"]) for bill in all_bills.values()) == to_cents(EXPECTED_TOTAL_BILL)
+
+    def test_allocate_cents(self):
+        """Test that split amounts keep every cent and give leftovers to the first members"""
+        assert list(allocate_cents(7000, 3)) == [2334, 2333, 2333]
+        assert list(allocate_cents(23800, 5)) == [4760] * 5
+        assert list(allocate_cents(-100, 3)) == [-33, -33, -34]
+
+        with pytest.raises(ValueError):
+            allocate_cents(100, 0)
+
+    def test_group_split_at_any_family_size(self):
+        """Test that plan group costs split exactly however many members share them"""
+        for size in range(1, 50):
+            test_config = self.calc.get_default_config()
+            members = [f"Member {i}" for i in range(size)]
+            test_config["family_members"] = members
+            test_config["plan_groups"] = {"group_one": {"members": members, "total_cost": 238.01}}
+            test_config["discount_assignments"] = {"legacy_tmobile_perk": [], "line_on_us": []}
+            test_config["equipment_config"]["iphone_16_assigned_to"] = members[0]
+            test_config["equipment_config"]["accessories_assigned_to"] = members[-1]
+            test_config["protection_plans"]["protected_members"] = members
+            test_config["plan_features"]["unlimited_plus"]["assigned_to"] = members[0]
+            test_config["one_time_charges"] = {}
+
+            bills = BillingEngine.from_config(test_config).compute()
+            shares = bills["base_plan_before_discounts"]
+            assert shares.sum() == 23801
+            assert shares.max() - shares.min() <= 1
+
+    def test_discount_assignments(self):
+        """Test that discounts follow the members assigned in the configuration"""
+        test_config = self.calc.get_default_config()
+        test_config["discount_assignments"]["legacy_tmobile_perk"] = ["Mama"]
+
+        calc = TMobileBillCalculator()
+        calc._apply_configuration(test_config)
+
+        assert calc.calculate_discounts("Mama") == 10.00
+        assert calc.calculate_discounts("Gavin") == 5.00
+
+    def test_legacy_config_with_other_members(self):
+        """Test that a config saved before discount assignments loads with its own members"""
+        legacy_config = self.calc.get_default_config()
+        del legacy_config["discount_assignments"]
+        members = ["Alex", "Sam", "Jo"]
+        legacy_config["family_members"] = members
+        legacy_config["phone_numbers"] = {member: "(502) 555-0100" for member in members}
+        legacy_config["plan_groups"] = {"group_one": {"members": members, "total_cost": 150.00}}
+        legacy_config["equipment_config"]["iphone_16_assigned_to"] = "Alex"
+        legacy_config["equipment_config"]["accessories_assigned_to"] = "Alex"
+        legacy_config["protection_plans"]["protected_members"] = ["Alex", "Jo"]
+        legacy_config["plan_features"]["unlimited_plus"]["assigned_to"] = "Sam"
+        legacy_config["one_time_charges"] = {"Jo": 1.25}
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(legacy_config, f)
+            temp_config_file = f.name
+
+        try:
+            calc = TMobileBillCalculator(temp_config_file)
+        finally:
+            os.unlink(temp_config_file)
+
+        assert calc.family_members == members
+        assert calc.discount_assignments == {"legacy_tmobile_perk": [], "line_on_us": []}
+        # Only AutoPay applies, since the default perk and Line On Us members are not in this family
+        for member in members:
+            assert calc.calculate_discounts(member) == 5.00
+        assert calc.calculate_member_bill("Jo")["one_time_charges"] == 1.25
+
+    def test_unknown_member_in_config(self):
+        """Test that rules naming members outside the family are rejected"""
+        test_config = self.calc.get_default_config()
+        test_config["protection_plans"]["protected_members"].append("InvalidMember")
+
+        with pytest.raises(ConfigurationError):
+            BillingEngine.from_config(test_config)
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])